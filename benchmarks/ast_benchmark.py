@@ -0,0 +1,95 @@
+import argparse
+import pathlib
+import time
+import tracemalloc
+from ogle.ast.ast_arena import ASTArena, node_types
+from ogle.lexer.lexer import Lexer
+from ogle.lexer.token_stream import TokenStream
+from ogle.parser.parser import Parser
+from benchmarks.parser_benchmark import generate_source
+
+
+# Times a preorder traversal that reads the type and value of every node
+def time_node_pass(root):
+    start = time.perf_counter()
+    nodes = [root]
+    while nodes:
+        node = nodes.pop()
+        node.node_type, node.value
+        nodes.extend(reversed(node.children))
+    return time.perf_counter() - start
+
+
+# The same preorder traversal over an arena, following the child links
+def time_arena_pass(arena):
+    start = time.perf_counter()
+    kinds = arena.kinds
+    values = arena.values
+    strings = arena.strings
+    for index in arena.preorder():
+        node_types[kinds[index]], strings[values[index]]
+    return time.perf_counter() - start
+
+
+# A pass that reads every node in any order. It only needs the flat arrays of
+# an arena, and does not follow the tree.
+def time_arena_scan(arena):
+    start = time.perf_counter()
+    strings = arena.strings
+    for kind, value in zip(arena.kinds, arena.values):
+        node_types[kind], strings[value]
+    return time.perf_counter() - start
+
+
+def count_nodes(root):
+    count = 0
+    nodes = [root]
+    while nodes:
+        node = nodes.pop()
+        count += 1
+        nodes.extend(node.children)
+    return count
+
+
+# Returns the parser with the memory held by the AST once it is built and its
+# peak while it is built, in bytes. The tokens are lexed before the measurement
+# starts. 'ast' is an empty ASTArena to measure the arena instead of the nodes.
+def measure_ast(stream, ast=None):
+    stream.rewind()
+    tracemalloc.start()
+    parser = Parser(stream, build_parse_tree=False, ast=ast)
+    parser.parse()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return parser, held, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the memory per AST node and a whole-tree pass on scaled-up samples')
+    parser.add_argument('--repetitions', type=int, default=100)
+    args = parser.parse_args()
+
+    # The grammar is loaded once per process
+    Parser(Lexer('main do end')).parse()
+
+    src_path = pathlib.Path(__file__).parent.parent.joinpath('data', 'src')
+    for sample_path in sorted(src_path.glob('*.src')):
+        input_text = generate_source(sample_path.read_text(), args.repetitions)
+        stream = TokenStream.from_lexer(Lexer(input_text))
+        parser, held, peak = measure_ast(stream)
+        if parser.errors:
+            print(f'{sample_path.name}: syntax errors')
+            continue
+        nodes = count_nodes(parser.ast.root)
+        print(f'{sample_path.name}: {nodes} nodes')
+        print(f'{"nodes":>8}: {held / nodes:6.0f} bytes/node held, {peak / nodes:6.0f} bytes/node peak, '
+              f'{held / 2 ** 20:6.1f} MiB, pass {time_node_pass(parser.ast.root) * 1000:6.1f}ms')
+        arena_parser, held, peak = measure_ast(stream, ASTArena())
+        arena = arena_parser.ast
+        print(f'{"arena":>8}: {held / nodes:6.0f} bytes/node held, {peak / nodes:6.0f} bytes/node peak, '
+              f'{held / 2 ** 20:6.1f} MiB, pass {time_arena_pass(arena) * 1000:6.1f}ms, '
+              f'unordered scan {time_arena_scan(arena) * 1000:6.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import random
+import time
+from ogle.parser import first_follow
+from ogle.parser.grammar_spec import terminals
+
+
+# Builds random rules over the language's terminals. Every non-terminal gets a
+# few rules that mostly refer to later non-terminals, with some references back
+# to create cycles, and about a fifth of them can vanish.
+def generate_rules(non_terminal_count, seed):
+    generator = random.Random(seed)
+    terminal_names = sorted(terminals)
+    names = ['N{}'.format(i) for i in range(non_terminal_count)]
+    rules = []
+    for i, name in enumerate(names):
+        for _ in range(generator.randint(1, 4)):
+            symbols = []
+            for _ in range(generator.randint(1, 6)):
+                if generator.random() < 0.4:
+                    symbols.append(generator.choice(terminal_names))
+                elif generator.random() < 0.9 and i + 1 < len(names):
+                    symbols.append(names[generator.randint(i + 1, len(names) - 1)])
+                else:
+                    symbols.append(names[generator.randint(0, i)])
+            rules.append((name, symbols))
+        if generator.random() < 0.2:
+            rules.append((name, []))
+    return rules
+
+
+def time_engine(rules, engine, rounds):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        first_follow.first_follow_sets(rules, 'N0', engine)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times the first/follow set engines on synthetic grammars')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rules = generate_rules(size, args.seed)
+        print(f'{size} non-terminals, {len(rules)} rules')
+        results = [first_follow.first_follow_sets(rules, 'N0', engine) for engine in first_follow.engines]
+        if any(result != results[0] for result in results):
+            print('  engines disagree')
+        for engine in first_follow.engines:
+            elapsed = time_engine(rules, engine, args.rounds)
+            print(f'{engine:>8}: {elapsed * 1000:10.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import pathlib
+import time
+from ogle.lexer.lexer import Lexer
+from ogle.lexer.parallel import lex_parallel
+
+
+def generate_source(repetitions):
+    # Concatenate the sample programs until the source is large enough
+    src_path = pathlib.Path(__file__).parent.parent.joinpath('data', 'src')
+    samples = [p.read_text() for p in sorted(src_path.glob('*.src'))]
+    return '\n'.join(samples) * repetitions
+
+
+def time_engine(input_text, engine, rounds):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        Lexer(input_text, engine=engine).all_tokens()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def time_parallel(input_text, workers, rounds):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        lex_parallel(input_text, workers=workers)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times the lexer engines on a large generated source')
+    parser.add_argument('--repetitions', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=0, help='also time parallel lexing with this many workers')
+    args = parser.parse_args()
+
+    input_text = generate_source(args.repetitions)
+    token_count = len(Lexer(input_text).all_tokens())
+    print(f'Source: {len(input_text)} characters, {token_count} tokens')
+
+    baseline = time_engine(input_text, 'loop', args.rounds)
+    for engine in Lexer.engines:
+        elapsed = baseline if engine == 'loop' else time_engine(input_text, engine, args.rounds)
+        print(f'{engine:>8}: {elapsed:8.3f}s  {token_count / elapsed:12.0f} tokens/s  x{baseline / elapsed:.2f}')
+    if args.workers:
+        elapsed = time_parallel(input_text, args.workers, args.rounds)
+        print(f'parallel: {elapsed:8.3f}s  {token_count / elapsed:12.0f} tokens/s  x{baseline / elapsed:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import pathlib
+import re
+import time
+import tracemalloc
+from ogle.lexer.lexer import Lexer
+from ogle.lexer.token_stream import TokenStream
+from ogle.parser.parser import Parser
+from ogle.parser.recognizer import Recognizer
+
+function_start = re.compile(r'^[A-Za-z][A-Za-z_0-9]*[ \t]*(?:::|\()', re.M)
+main_start = re.compile(r'^main\b', re.M)
+
+
+def generate_source(sample, repetitions):
+    # Repeat the classes and the functions of the sample, keeping one main
+    main = main_start.search(sample).start()
+    function = function_start.search(sample, 0, main)
+    functions = function.start() if function else main
+    return sample[:functions] * repetitions + sample[functions:main] * repetitions + sample[main:]
+
+
+# The 'recognizer' engine only checks the syntax
+def parse(stream, engine, build_parse_tree):
+    stream.rewind()
+    if engine == 'recognizer':
+        parser = Recognizer(stream)
+    else:
+        parser = Parser(stream, engine=engine, build_parse_tree=build_parse_tree)
+    parser.parse()
+    return parser
+
+
+def time_parser(stream, engine, build_parse_tree, rounds):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        parse(stream, engine, build_parse_tree)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# Returns the peak memory allocated while parsing, in bytes
+def measure_memory(stream, engine, build_parse_tree):
+    tracemalloc.start()
+    parser = parse(stream, engine, build_parse_tree)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Keep the results alive until the measurement is done
+    del parser
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times the parser with and without the parse tree on scaled-up samples')
+    parser.add_argument('--repetitions', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    # The grammar is loaded once per process
+    parse(TokenStream.from_lexer(Lexer('main do end')), 'iterative', False)
+
+    src_path = pathlib.Path(__file__).parent.parent.joinpath('data', 'src')
+    configurations = [(engine, True) for engine in ('iterative', 'recursive')] + \
+        [(engine, False) for engine in Parser.engines] + [('recognizer', False)]
+    for sample_path in sorted(src_path.glob('*.src')):
+        input_text = generate_source(sample_path.read_text(), args.repetitions)
+        stream = TokenStream.from_lexer(Lexer(input_text))
+        print(f'{sample_path.name}: {len(stream)} tokens')
+
+        baseline = None
+        for engine, build_parse_tree in configurations:
+            elapsed = time_parser(stream, engine, build_parse_tree, args.rounds)
+            peak = measure_memory(stream, engine, build_parse_tree)
+            baseline = baseline or elapsed
+            mode = 'tree' if build_parse_tree else 'no tree'
+            print(f'{engine:>10} {mode:>8}: {elapsed:8.3f}s  {len(stream) / elapsed:10.0f} tokens/s  '
+                  f'x{baseline / elapsed:.2f}  peak {peak / 2 ** 20:8.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
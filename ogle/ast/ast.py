@@ -1,6 +1,7 @@
 from collections import deque
 from graphviz import Digraph
-from ogle.ast.ast_node import Node
+from ogle.ast.ast_node import Node, NodeType, node_name_to_type
+from ogle.parser.grammar_spec import terminal_count, terminal_id_set, terminal_ids, terminals
 
 
 terminal_nodes = [
@@ -39,42 +40,79 @@ terminal_nodes = [
     'noteq'
 ]
 
+# terminal_node_ids[terminal id] is set for the terminals in terminal_nodes
+terminal_node_ids = terminal_id_set(terminal_nodes)
+
+
+# Returns the NodeType of the node made from every terminal id. The nodes are
+# named by their token type.
+def _terminal_node_types():
+    to_ret = [NodeType.GENERAL] * terminal_count
+    for terminal in terminal_nodes:
+        to_ret[terminal_ids[terminal]] = node_name_to_type.get(terminals[terminal], NodeType.GENERAL)
+    return to_ret
+
+
+terminal_node_types = _terminal_node_types()
+
+# Opcodes of the semantic actions #1..#7
+MAKE_NODE = 1
+MAKE_RIGHT_CHILD = 2
+MAKE_LEFT_CHILD = 3
+ADOPT_RIGHT_CHILDREN = 4
+GROUP_TOGETHER = 5
+DELETE_TOP = 6
+REPLACE_NODE_WITH_CHILD = 7
+
+
+# Decodes a semantic action like '#2' or '#1(item)' into a tuple of (opcode,
+# node name, node type). Only MAKE_NODE has a node name and type.
+def decode_action(operation, lhs_name):
+    opcode = int(operation[1])
+    if opcode == MAKE_NODE:
+        name = lhs_name if '(' not in operation else operation[3:-1]
+        return opcode, name, node_name_to_type.get(name, NodeType.GENERAL)
+    if not MAKE_RIGHT_CHILD <= opcode <= REPLACE_NODE_WITH_CHILD:
+        raise ValueError
+    return opcode, None, None
+
 
 class AST(object):
     def __init__(self):
         self.root = None
         self.stack = deque()
         self.ignore_input = False
+        # The stack operations of the actions without a node, by opcode
+        self._operations = (None, None, self._make_right_child, self._make_left_child,
+                            self._adopt_right_children, self._group_together, self._delete_top,
+                            self._replace_node_with_child)
 
-    def make_node(self, name, value=None, location=None):
+    def make_node(self, name, value=None, location=None, offset=None, source=None, node_type=None):
         if self.ignore_input:
             return
-        self.stack.append(Node(name, value, location))
+        self.stack.append(Node(name, value, location, offset, source, node_type))
 
     def perform_operation(self, operation, lhs_name):
         if self.ignore_input:
             return
+        self.perform_action(decode_action(operation, lhs_name))
 
-        operation_number = int(operation[1])
-        if operation_number == 1:
-            self.make_node(lhs_name if '(' not in operation else operation[3:-1])
-        elif operation_number == 2:
-            self._make_right_child()
-        elif operation_number == 3:
-            self._make_left_child()
-        elif operation_number == 4:
-            self._adopt_right_children()
-        elif operation_number == 5:
-            self._group_together()
-        elif operation_number == 6:
-            self._delete_top()
-        elif operation_number == 7:
-            self._replace_node_with_child()
+    # Performs an action decoded by decode_action
+    def perform_action(self, action):
+        if self.ignore_input:
+            return
+        opcode, name, node_type = action
+        if opcode == MAKE_NODE:
+            self.stack.append(Node(name, node_type=node_type))
         else:
-            raise ValueError
+            self._operations[opcode]()
 
+    # The children of the nodes are frozen into tuples
+    # The root stays None when the input could not start the program
     def finish_building(self):
-        self.root = self.stack[0]
+        if self.stack:
+            self.root = self.stack[0]
+            self.root.freeze()
         self.ignore_input = True
 
     # Pop X & Y, make Y right child of X, push X
@@ -102,10 +140,11 @@ class AST(object):
     def _group_together(self):
         x = self.stack.pop()
         parent = Node(x.name + '_list')
-        parent.children.appendleft(x)
+        parent.children.append(x)
         while self.stack[-1].name == x.name:
             x = self.stack.pop()
-            parent.children.appendleft(x)
+            parent.children.append(x)
+        parent.children.reverse()
         self.stack.append(parent)
 
     def _delete_top(self):
@@ -131,11 +170,11 @@ class ASTVisualizer(object):
         self.dot.render(filename=input_file_name + '_AST.gv')
 
     def _add_nodes(self, root):
-        self.dot.node(root.unique_id, root.value if root.value != '<>' else '"<>"')
+        self.dot.node(str(root.unique_id), root.value if root.value != '<>' else '"<>"')
         for child in root.children:
             self._add_nodes(child)
 
     def _add_edges(self, root):
         for child in root.children:
-            self.dot.edge(root.unique_id, child.unique_id)
+            self.dot.edge(str(root.unique_id), str(child.unique_id))
             self._add_edges(child)
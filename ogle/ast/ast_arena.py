@@ -0,0 +1,262 @@
+from array import array
+from ogle.ast.ast import MAKE_NODE
+from ogle.ast.ast_node import Node, NodeType, node_name_to_type
+
+NO_NODE = -1
+
+# NodeType members by their index in the kinds array
+node_types = list(NodeType)
+_node_type_indices = {node_type: index for index, node_type in enumerate(node_types)}
+
+
+# An AST whose nodes are indices into parallel arrays instead of Node objects:
+# the kind, name and value of every node, the source offset of its token, and
+# its first child, next sibling and parent. Names and values are indices into
+# an interned string table.
+#
+# It is built by the same stack operations as AST, so it can be given to the
+# Parser in place of an AST, and it can be converted from and to Node graphs.
+class ASTArena(object):
+    def __init__(self, source=None):
+        self.root = None
+        self.stack = []
+        self.ignore_input = False
+        self.strings = []
+        self._string_ids = {}
+        self.kinds = array('b')
+        self.names = array('i')
+        self.values = array('i')
+        # NO_NODE when the node was not made from a token
+        self.offsets = array('i')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.parent = array('i')
+        # Only used while building, to add right children in constant time
+        self._last_child = array('i')
+        # The SourceIndex of the offsets
+        self.source = source
+        # Locations of the nodes that were converted with a location but no offset
+        self.locations = {}
+        # The stack operations of the actions without a node, by opcode
+        self._operations = (None, None, self._make_right_child, self._make_left_child,
+                            self._adopt_right_children, self._group_together, self._delete_top,
+                            self._replace_node_with_child)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def intern(self, string):
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            string_id = self._string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    # Adds a node without children and returns its index
+    def add_node(self, name, value=None, offset=None, node_type=None):
+        if node_type is None:
+            node_type = node_name_to_type.get(name, NodeType.GENERAL)
+        index = len(self.kinds)
+        name_id = self.intern(name)
+        self.kinds.append(_node_type_indices[node_type])
+        self.names.append(name_id)
+        self.values.append(self.intern(value) if value else name_id)
+        self.offsets.append(NO_NODE if offset is None else offset)
+        self.first_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.parent.append(NO_NODE)
+        self._last_child.append(NO_NODE)
+        return index
+
+    def make_node(self, name, value=None, location=None, offset=None, source=None, node_type=None):
+        if self.ignore_input:
+            return
+        index = self.add_node(name, value, offset, node_type)
+        if source is not None:
+            self.source = source
+        if location is not None:
+            self.locations[index] = location
+        self.stack.append(index)
+
+    # Performs an action decoded by decode_action
+    def perform_action(self, action):
+        if self.ignore_input:
+            return
+        opcode, name, node_type = action
+        if opcode == MAKE_NODE:
+            self.stack.append(self.add_node(name, node_type=node_type))
+        else:
+            self._operations[opcode]()
+
+    # The root stays None when the input could not start the program
+    def finish_building(self):
+        if self.stack:
+            self.root = self.stack[0]
+        self.ignore_input = True
+
+    def name(self, index):
+        return self.strings[self.names[index]]
+
+    def value(self, index):
+        return self.strings[self.values[index]]
+
+    def node_type(self, index):
+        return node_types[self.kinds[index]]
+
+    def location(self, index):
+        offset = self.offsets[index]
+        if offset == NO_NODE or self.source is None:
+            return self.locations.get(index)
+        return self.source.position(offset)
+
+    # Yields the indices of the children of a node
+    def children(self, index):
+        child = self.first_child[index]
+        next_sibling = self.next_sibling
+        while child != NO_NODE:
+            yield child
+            child = next_sibling[child]
+
+    # Yields the indices of the nodes of the subtree in preorder
+    def preorder(self, index=None):
+        if index is None:
+            index = self.root
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        pending = [index]
+        while pending:
+            index = pending.pop()
+            yield index
+            child = first_child[index]
+            children = []
+            while child != NO_NODE:
+                children.append(child)
+                child = next_sibling[child]
+            children.reverse()
+            pending.extend(children)
+
+    # Appends y to the children of x
+    def _append_child(self, x, y):
+        last = self._last_child[x]
+        if last == NO_NODE:
+            self.first_child[x] = y
+        else:
+            self.next_sibling[last] = y
+        self._last_child[x] = y
+        self.next_sibling[y] = NO_NODE
+        self.parent[y] = x
+
+    # Pop X & Y, make Y right child of X, push X
+    def _make_right_child(self):
+        y = self.stack.pop()
+        x = self.stack[-1]
+        self._append_child(x, y)
+
+    # Pop X & Y, make X left child of Y, push Y
+    def _make_left_child(self):
+        y = self.stack.pop()
+        x = self.stack.pop()
+        self.next_sibling[x] = self.first_child[y]
+        self.first_child[y] = x
+        if self._last_child[y] == NO_NODE:
+            self._last_child[y] = x
+        self.parent[x] = y
+        self.stack.append(y)
+
+    # Pop X & Y, X adopts Y's children, push X
+    def _adopt_right_children(self):
+        y = self.stack.pop()
+        x = self.stack[-1]
+        child = self.first_child[y]
+        if child == NO_NODE:
+            return
+        if self._last_child[x] == NO_NODE:
+            self.first_child[x] = child
+        else:
+            self.next_sibling[self._last_child[x]] = child
+        self._last_child[x] = self._last_child[y]
+        while child != NO_NODE:
+            self.parent[child] = x
+            child = self.next_sibling[child]
+        self.first_child[y] = self._last_child[y] = NO_NODE
+
+    # Group all the Xs on top the stack with the same name under one Z
+    def _group_together(self):
+        x = self.stack.pop()
+        name = self.names[x]
+        group = [x]
+        while self.names[self.stack[-1]] == name:
+            group.append(self.stack.pop())
+        parent = self.add_node(self.strings[name] + '_list')
+        for x in reversed(group):
+            self._append_child(parent, x)
+        self.stack.append(parent)
+
+    def _delete_top(self):
+        self.stack.pop()
+
+    # if X has only one child, replace it with the child
+    def _replace_node_with_child(self):
+        x = self.stack[-1]
+        child = self.first_child[x]
+        if child != NO_NODE and self.next_sibling[child] == NO_NODE:
+            self.parent[child] = NO_NODE
+            self.stack[-1] = child
+
+    # Returns a copy of the tree under the root that keeps only its nodes, in
+    # preorder. Whole-tree passes over it can run through the arrays in order.
+    def compacted(self):
+        order = list(self.preorder())
+        new_indices = {index: new_index for new_index, index in enumerate(order)}
+        arena = ASTArena(self.source)
+        arena.strings = list(self.strings)
+        arena._string_ids = dict(self._string_ids)
+        for name in ('kinds', 'names', 'values', 'offsets'):
+            column = getattr(self, name)
+            getattr(arena, name).extend(column[index] for index in order)
+        for name in ('first_child', 'next_sibling', 'parent', '_last_child'):
+            column = getattr(self, name)
+            getattr(arena, name).extend(new_indices.get(column[index], NO_NODE) for index in order)
+        arena.parent[0] = NO_NODE
+        arena.next_sibling[0] = NO_NODE
+        arena.locations = {new_indices[index]: location for index, location in self.locations.items()
+                           if index in new_indices}
+        arena.root = 0
+        arena.ignore_input = True
+        return arena
+
+    # Builds an arena from the Node graph under root
+    @classmethod
+    def from_node(cls, root):
+        arena = cls()
+        pending = [(root, NO_NODE)]
+        while pending:
+            node, parent = pending.pop()
+            index = arena.add_node(node.name, node.value, node.offset, node.node_type)
+            if node.source is not None:
+                if arena.source is not None and arena.source is not node.source:
+                    raise ValueError('The nodes come from different sources')
+                arena.source = node.source
+            elif node.location is not None:
+                arena.locations[index] = node.location
+            if parent != NO_NODE:
+                arena._append_child(parent, index)
+            pending.extend((child, index) for child in reversed(node.children))
+        arena.root = 0
+        arena.ignore_input = True
+        return arena
+
+    # Builds the Node graph of the subtree, with frozen children
+    def to_node(self, index=None):
+        if index is None:
+            index = self.root
+        nodes = {}
+        indices = list(self.preorder(index))
+        for index in reversed(indices):
+            offset = self.offsets[index]
+            node = Node(self.name(index), self.value(index), self.locations.get(index),
+                        None if offset == NO_NODE else offset, self.source if offset != NO_NODE else None,
+                        self.node_type(index))
+            node.children = tuple(nodes.pop(child) for child in self.children(index))
+            nodes[index] = node
+        return nodes[indices[0]]
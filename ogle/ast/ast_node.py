@@ -1,4 +1,4 @@
-from collections import deque
+from itertools import count
 from enum import Enum, unique, auto
 
 
@@ -39,32 +39,66 @@ class NodeType(Enum):
     WRITE_STATEMENT = auto()
 
 
+# Nodes have slots instead of a __dict__ to keep big ASTs small. The children
+# are a list while the AST is built and a tuple once it is finished.
 class Node(object):
-    counter = 1
+    __slots__ = ('name', 'node_type', 'value', '_location', 'offset', 'source', 'children', 'identifier',
+                 '_unique_id')
 
-    def __init__(self, name, value=None, location=None):
+    # The ids handed out to the nodes that ask for one
+    _ids = count(1)
+
+    # node_type can be given when it is already known, to skip the lookup
+    def __init__(self, name, value=None, location=None, offset=None, source=None, node_type=None):
         self.name = name
-        self.node_type = node_name_to_type[name] if name in node_name_to_type else NodeType.GENERAL
+        if node_type is None:
+            node_type = node_name_to_type.get(name, NodeType.GENERAL)
+        self.node_type = node_type
         self.value = value if value else name
-        self.location = location
-        self.children = deque()
+        self._location = location
+        # Source offset of the token this node was made from. The location
+        # is computed from it by the SourceIndex only when it is asked for.
+        self.offset = offset
+        self.source = source
+        self.children = []
         self.identifier = None
-        self.unique_id = str(Node.counter)
-        Node.counter += 1
+        self._unique_id = None
+
+    # An integer id that is unique among the nodes, only made when it is used
+    @property
+    def unique_id(self):
+        if self._unique_id is None:
+            self._unique_id = next(Node._ids)
+        return self._unique_id
+
+    @property
+    def location(self):
+        if self._location is None and self.source is not None:
+            return self.source.position(self.offset)
+        return self._location
 
     def make_right_child(self, other):
         self.children.append(other)
 
     def make_left_child(self, other):
-        self.children.appendleft(other)
+        self.children.insert(0, other)
 
     def adopt_children_right(self, other):
-        for child in other.children:
-            self.children.append(child)
+        self.children.extend(other.children)
 
     def adopt_children_left(self, other):
-        for child in reversed(other.children):
-            self.children.appendleft(child)
+        self.children[:0] = other.children
+
+    # Turns the children of every node of the subtree into tuples. Subtrees
+    # that are already frozen are skipped.
+    def freeze(self):
+        nodes = [self]
+        while nodes:
+            node = nodes.pop()
+            if type(node.children) is tuple:
+                continue
+            node.children = tuple(node.children)
+            nodes.extend(node.children)
 
     def __str__(self):
         return 'Node({})'.format(self.name)
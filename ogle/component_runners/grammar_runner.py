@@ -0,0 +1,29 @@
+import argparse
+import sys
+from ogle.parser.grammar_analysis import GrammarAnalyzer
+from ogle.parser.parser import Grammar, GrammarError, grammar_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reports the LL(1) conflicts and parse table statistics of a grammar')
+    parser.add_argument('grammar_file', type=str, nargs='?', default=grammar_path)
+    grammar_file = parser.parse_args().grammar_file
+
+    try:
+        grammar = Grammar(grammar_file)
+    except GrammarError as error:
+        # The rules cannot be analyzed with symbols missing
+        print(f'Undefined symbols: {len(error.undefined)}')
+        for symbol in sorted(error.undefined):
+            print(f'\t{symbol} in {", ".join(error.undefined[symbol])}')
+        sys.exit(1)
+
+    analyzer = GrammarAnalyzer(grammar)
+    print(analyzer.report(), end='')
+    # Fail when the grammar has problems, so the check can run before a release
+    if analyzer.has_problems():
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
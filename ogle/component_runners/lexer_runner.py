@@ -1,5 +1,7 @@
 import argparse
+from ogle.lexer.language_spec import ERROR_KIND
 from ogle.lexer.lexer import Lexer
+from ogle.lexer.token_stream import TokenStream
 
 
 def main():
@@ -8,20 +10,18 @@ def main():
     file_name = parser.parse_args().file_name
     file_name_no_type = file_name.split('.')[0]
 
-    # open the file and read
-    with open(file_name, 'r') as input_file, \
+    # map the file and lex it in place
+    with Lexer.from_file(file_name) as lexer, \
             open(file_name_no_type + '.outlextokens', 'w') as token_out, \
             open(file_name_no_type + '.outlexerrors', 'w') as error_out:
-        input_text = input_file.read()
-        lexer = Lexer(input_text)
-        all_tokens = lexer.all_tokens()
-        tokens = [x for x in all_tokens if x.type is not 'ERROR']
-        errors = [x for x in all_tokens if x.type is 'ERROR']
+        stream = TokenStream.from_lexer(lexer)
 
-        for token in tokens:
-            token_out.write(str(token) + '\n')
-        for error in errors:
-            error_out.write(str(error) + '\n')
+        for i in range(len(stream)):
+            if stream.kinds[i] != ERROR_KIND:
+                token_out.write(str(stream[i]) + '\n')
+        for i in range(len(stream)):
+            if stream.kinds[i] == ERROR_KIND:
+                error_out.write(str(stream[i]) + '\n')
 
 
 if __name__ == '__main__':
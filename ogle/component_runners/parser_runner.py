@@ -1,30 +1,33 @@
 import argparse
 from ogle.lexer.lexer import Lexer
 from ogle.parser.parser import Parser
+from ogle.parser.parser_hooks import ParseStats
 from ogle.ast.ast import ASTVisualizer
 
 
 def main():
     parser = argparse.ArgumentParser(description='Gets an input file and parses the file')
     parser.add_argument('file_name', type=str)
-    file_name = parser.parse_args().file_name
+    parser.add_argument('--parse-stats', action='store_true', help='print the parse event counts and the throughput')
+    args = parser.parse_args()
+    file_name = args.file_name
     file_name_no_type = file_name.split('.')[0]
 
-    # open the file and read
-    with open(file_name, 'r') as input_file, \
+    # map the file and lex it in place
+    with Lexer.from_file(file_name) as lexer, \
             open(file_name_no_type + '.outderivation', 'w') as derivation_file, \
             open(file_name_no_type + '.outparseerrors', 'w') as error_file:
-        input_text = input_file.read()
-        lexer = Lexer(input_text)
-        parser = Parser(lexer)
+        stats = ParseStats() if args.parse_stats else None
+        parser = Parser(lexer, build_parse_tree=True, hooks=stats)
         parser.parse()
+        if stats is not None:
+            print(stats.report(), end='')
 
         # Output the results
         ASTVisualizer(parser.ast).visualize(file_name_no_type)
         for error in parser.errors:
             error_file.write(error + '\n')
-        for derivation in parser.parse_tree.derivation_list:
-            derivation_file.write(derivation + '\n')
+        parser.parse_tree.write_derivations(derivation_file)
 
 
 if __name__ == '__main__':
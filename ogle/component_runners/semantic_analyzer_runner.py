@@ -11,11 +11,9 @@ def main():
     file_name = parser.parse_args().file_name
     file_name_no_type = file_name.split('.')[0]
 
-    # open the file and read
-    with open(file_name, 'r') as input_file:
-        input_text = input_file.read()
-        lexer = Lexer(input_text)
-        parser = Parser(lexer)
+    # map the file and lex it in place
+    with Lexer.from_file(file_name) as lexer:
+        parser = Parser(lexer, build_parse_tree=False)
         parser.parse()
         if parser.errors:
             with open(file_name_no_type + '.outparseerrors', 'w') as error_file:
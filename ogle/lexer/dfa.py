@@ -0,0 +1,291 @@
+from ogle.lexer.language_spec import *
+
+# Characters are grouped by their code point. Every code point above the
+# ASCII range shares the last column, since the language spec never names one.
+ALPHABET_SIZE = 129
+OTHER_CHARACTER = 128
+ALL_CHARACTERS = frozenset(range(ALPHABET_SIZE))
+
+# Accepting rule categories
+WHITESPACE = 0
+COMMENT = 1
+TOKEN = 2
+
+
+class RegexSyntaxError(Exception):
+    def __init__(self, pattern, position, message):
+        super().__init__('{} at position {} of {!r}'.format(message, position, pattern))
+        self.pattern = pattern
+        self.position = position
+
+
+class NFA(object):
+    def __init__(self):
+        # Per state: list of (character set, target) and list of epsilon targets
+        self.edges = []
+        self.epsilon = []
+        # Maps an accepting state to the index of the rule it accepts
+        self.accepts = {}
+
+    def new_state(self):
+        self.edges.append([])
+        self.epsilon.append([])
+        return len(self.edges) - 1
+
+    def add_edge(self, source, characters, target):
+        self.edges[source].append((characters, target))
+
+    def add_epsilon(self, source, target):
+        self.epsilon[source].append(target)
+
+
+# Builds Thompson NFA fragments for the regex subset used in language_spec:
+# literals, escapes, '.', character classes with ranges and negation,
+# groups (capturing or '(?:'), '|', and the greedy '*', '+', '?'.
+class RegexCompiler(object):
+    escapes = {
+        'n': frozenset([ord('\n')]),
+        't': frozenset([ord('\t')]),
+        'd': frozenset(range(ord('0'), ord('9') + 1)),
+        's': frozenset(map(ord, ' \t\n\r\f\v')),
+    }
+    escapes['S'] = ALL_CHARACTERS - escapes['s']
+
+    def __init__(self, nfa):
+        self.nfa = nfa
+        self.pattern = ''
+        self.pos = 0
+
+    # Returns the (start, end) states of the fragment matching the pattern
+    def compile(self, pattern):
+        self.pattern = pattern
+        self.pos = 0
+        fragment = self._alternation()
+        if self.pos != len(pattern):
+            self._error('Unbalanced parenthesis')
+        return fragment
+
+    def _error(self, message):
+        raise RegexSyntaxError(self.pattern, self.pos, message)
+
+    def _peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else None
+
+    def _alternation(self):
+        branches = [self._concatenation()]
+        while self._peek() == '|':
+            self.pos += 1
+            branches.append(self._concatenation())
+        if len(branches) == 1:
+            return branches[0]
+
+        start, end = self.nfa.new_state(), self.nfa.new_state()
+        for branch_start, branch_end in branches:
+            self.nfa.add_epsilon(start, branch_start)
+            self.nfa.add_epsilon(branch_end, end)
+        return start, end
+
+    def _concatenation(self):
+        start = end = self.nfa.new_state()
+        while self._peek() not in (None, '|', ')'):
+            piece_start, piece_end = self._repetition()
+            self.nfa.add_epsilon(end, piece_start)
+            end = piece_end
+        return start, end
+
+    def _repetition(self):
+        atom_start, atom_end = self._atom()
+        operator = self._peek()
+        if operator not in ('*', '+', '?'):
+            return atom_start, atom_end
+        self.pos += 1
+        if self._peek() == '?':
+            self._error('Lazy quantifiers have no DFA equivalent')
+
+        start, end = self.nfa.new_state(), self.nfa.new_state()
+        self.nfa.add_epsilon(start, atom_start)
+        self.nfa.add_epsilon(atom_end, end)
+        if operator in ('*', '?'):
+            self.nfa.add_epsilon(start, end)
+        if operator in ('*', '+'):
+            self.nfa.add_epsilon(atom_end, atom_start)
+        return start, end
+
+    def _atom(self):
+        char = self._peek()
+        if char is None:
+            self._error('Unexpected end of pattern')
+        if char in '*+?':
+            self._error('Nothing to repeat')
+        self.pos += 1
+
+        if char == '(':
+            if self.pattern.startswith('?:', self.pos):
+                self.pos += 2
+            fragment = self._alternation()
+            if self._peek() != ')':
+                self._error('Missing closing parenthesis')
+            self.pos += 1
+            return fragment
+
+        if char == '[':
+            characters = self._character_class()
+        elif char == '.':
+            characters = ALL_CHARACTERS - {ord('\n')}
+        elif char == '\\':
+            characters = self._escape()
+        else:
+            characters = frozenset([ord(char)])
+
+        start, end = self.nfa.new_state(), self.nfa.new_state()
+        self.nfa.add_edge(start, characters, end)
+        return start, end
+
+    def _escape(self):
+        char = self._peek()
+        if char is None:
+            self._error('Dangling backslash')
+        self.pos += 1
+        if char in self.escapes:
+            return self.escapes[char]
+        return frozenset([ord(char)])
+
+    def _class_member(self):
+        char = self._peek()
+        if char is None:
+            self._error('Unterminated character class')
+        self.pos += 1
+        if char == '\\':
+            escaped = self._escape()
+            return escaped, None if len(escaped) != 1 else next(iter(escaped))
+        return frozenset([ord(char)]), ord(char)
+
+    def _character_class(self):
+        negated = self._peek() == '^'
+        if negated:
+            self.pos += 1
+
+        characters = set()
+        first = True
+        while first or self._peek() != ']':
+            first = False
+            members, low = self._class_member()
+            # Ranges such as 'a-z'. A '-' right before ']' is a literal.
+            if low is not None and self._peek() == '-' and \
+                    self.pos + 1 < len(self.pattern) and self.pattern[self.pos + 1] != ']':
+                self.pos += 1
+                _, high = self._class_member()
+                if high is None or high < low:
+                    self._error('Bad character range')
+                members = frozenset(range(low, high + 1))
+            characters |= members
+        self.pos += 1
+
+        if negated:
+            return ALL_CHARACTERS - characters
+        return frozenset(characters)
+
+
+class DFA(object):
+    def __init__(self, transitions, char_classes, accepts, rules):
+        # transitions[state][character class] is the next state, or -1
+        self.transitions = transitions
+        # char_classes[code point] is the class of the code point (see OTHER_CHARACTER)
+        self.char_classes = char_classes
+        # accepts[state] is the index of the rule accepted in that state, or -1
+        self.accepts = accepts
+        # rules[index] is a (category, token kind) tuple
+        self.rules = rules
+
+    @property
+    def state_count(self):
+        return len(self.transitions)
+
+    @property
+    def class_count(self):
+        return len(self.transitions[0]) if self.transitions else 0
+
+
+def _epsilon_closure(nfa, states):
+    closure = set(states)
+    stack = list(states)
+    while stack:
+        state = stack.pop()
+        for target in nfa.epsilon[state]:
+            if target not in closure:
+                closure.add(target)
+                stack.append(target)
+    return frozenset(closure)
+
+
+# Builds a longest-match DFA out of (category, token kind, pattern) rules.
+# When two rules accept the same lexeme, the one listed first wins.
+def build_dfa(rules):
+    nfa = NFA()
+    compiler = RegexCompiler(nfa)
+    start = nfa.new_state()
+    for index, (_, _, pattern) in enumerate(rules):
+        fragment_start, fragment_end = compiler.compile(pattern)
+        nfa.add_epsilon(start, fragment_start)
+        nfa.accepts[fragment_end] = index
+
+    # Subset construction over single code points
+    start_set = _epsilon_closure(nfa, [start])
+    state_ids = {start_set: 0}
+    state_sets = [start_set]
+    raw_transitions = []
+    for nfa_states in state_sets:
+        row = [-1] * ALPHABET_SIZE
+        targets = {}
+        for state in nfa_states:
+            for characters, target in nfa.edges[state]:
+                for code in characters:
+                    targets.setdefault(code, set()).add(target)
+        for code, target_states in targets.items():
+            target_set = _epsilon_closure(nfa, target_states)
+            if target_set not in state_ids:
+                state_ids[target_set] = len(state_sets)
+                state_sets.append(target_set)
+            row[code] = state_ids[target_set]
+        raw_transitions.append(row)
+
+    accepts = []
+    for nfa_states in state_sets:
+        accepted = [nfa.accepts[s] for s in nfa_states if s in nfa.accepts]
+        accepts.append(min(accepted) if accepted else -1)
+
+    # Merge code points that behave identically in every state into one class
+    class_ids = {}
+    char_classes = []
+    for code in range(ALPHABET_SIZE):
+        column = tuple(row[code] for row in raw_transitions)
+        char_classes.append(class_ids.setdefault(column, len(class_ids)))
+    columns = sorted(class_ids.items(), key=lambda item: item[1])
+    transitions = [[column[state] for column, _ in columns] for state in range(len(state_sets))]
+
+    return DFA(transitions, char_classes, accepts, [(category, kind) for category, kind, _ in rules])
+
+
+def lexer_rules():
+    # Same priority order as the regex engines
+    rules = [
+        # Line ends are skipped like whitespace, positions come from offsets
+        (WHITESPACE, None, '[{}\\n]+'.format(''.join('\\' + c for c in whitespace))),
+    ]
+    rules.extend((COMMENT, None, pattern) for pattern in dfa_comments)
+    # Keywords tie with ID on the same lexeme and win by coming first
+    rules.extend((TOKEN, keyword_kinds[keyword], keyword) for keyword in reserved_keywords)
+    rules.extend((TOKEN, token_kinds[token], regex) for token, regex in tokens.items())
+    rules.extend((TOKEN, token_kinds[char], '\\' + char) for char in special_characters)
+    return rules
+
+
+_lexer_dfa = None
+
+
+# Builds the lexer DFA on first use and shares it between lexers
+def lexer_dfa():
+    global _lexer_dfa
+    if _lexer_dfa is None:
+        _lexer_dfa = build_dfa(lexer_rules())
+    return _lexer_dfa
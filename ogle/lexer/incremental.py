@@ -0,0 +1,91 @@
+from bisect import bisect_left, bisect_right
+from ogle.lexer.language_spec import token_kinds
+from ogle.lexer.lexer import Lexer
+
+# How many characters past its end a token's lexing may have looked at
+# (e.g. '1e+' lexes as '1' only after seeing that no digit follows '+')
+LOOKAHEAD = 3
+
+SLASH_KIND = token_kinds['/']
+STAR_KIND = token_kinds['*']
+
+
+class TextEdit(object):
+    def __init__(self, start, end, text):
+        # Replaces old_text[start:end] with text
+        self.start = start
+        self.end = end
+        self.text = text
+
+    @property
+    def delta(self):
+        return len(self.text) - (self.end - self.start)
+
+    @property
+    def new_end(self):
+        return self.start + len(self.text)
+
+
+def _token_end(token):
+    return token.offset + len(token.value)
+
+
+# Index of the last token that the edit cannot have changed, or -1
+def _last_safe_token(tokens, edit):
+    safe = -1
+    for i, token in enumerate(tokens):
+        if _token_end(token) + LOOKAHEAD > edit.start:
+            break
+        safe = i
+
+    # '/' followed by '*' is an unterminated comment: the comment regex failed
+    # because no '*/' came after it, so any edit may turn it back into a comment.
+    # The '*' may be the first token past the safe ones.
+    for i in range(1, min(safe + 2, len(tokens))):
+        if tokens[i - 1].kind == SLASH_KIND and tokens[i].kind == STAR_KIND and tokens[i].offset == tokens[i - 1].offset + 1:
+            return i - 2
+    return safe
+
+
+# Re-lexes new_text after an edit, reusing the tokens lexed from the old text.
+# Lexing restarts at the last token the edit cannot affect and stops as soon as
+# a new token lines up with an old one past the edit. The remaining old tokens
+# are moved to the new source in place and reused.
+def relex(tokens, edit, new_text, engine='regex'):
+    safe = _last_safe_token(tokens, edit)
+    result = tokens[:safe + 1]
+    lexer = Lexer(new_text, engine=engine)
+    new_source = lexer.source
+    old_source = tokens[0].source if tokens else None
+    restart = _token_end(tokens[safe]) if safe >= 0 else 0
+    lexer.seek(restart)
+    # Comments before the restart point are not lexed again
+    if old_source is not None:
+        new_source.comment_ends.extend(old_source.comment_ends[:bisect_left(old_source.comment_ends, restart)])
+
+    # Walks the old tokens alongside the new ones to find where the streams meet
+    old_index = safe + 1
+    token = lexer.next_token()
+    while token:
+        if token.offset >= edit.new_end:
+            old_offset = token.offset - edit.delta
+            while old_index < len(tokens) and tokens[old_index].offset < old_offset:
+                old_index += 1
+            if old_index < len(tokens):
+                old = tokens[old_index]
+                if old.offset == old_offset and old.kind == token.kind and old.value == token.value:
+                    # Comments after the meeting point are not lexed again either
+                    later_comments = old_source.comment_ends[bisect_right(old_source.comment_ends, old_offset):]
+                    new_source.comment_ends.extend(end + edit.delta for end in later_comments)
+                    rest = tokens[old_index:]
+                    for old_token in rest:
+                        old_token.offset += edit.delta
+                        old_token.source = new_source
+                    result.extend(rest)
+                    break
+        result.append(token)
+        token = lexer.next_token()
+
+    for old_token in result[:safe + 1]:
+        old_token.source = new_source
+    return result
@@ -38,6 +38,20 @@ reserved_keywords = {
 }
 
 comments = r'(/\*(.|\n)*?\*/)|(//.*(\n[ \t]*//.*)*)'
+# The same comments without the lazy quantifier, for the DFA lexer
+dfa_comments = [r'/\*([^*]|\*+[^*/])*\*+/', r'//.*(\n[ \t]*//.*)*']
 
-whitespace = ' \t'
+# Carriage returns of CRLF line ends are skipped like any other whitespace
+whitespace = ' \t\r'
 line_end = r'\n+'
+# Unknown lexemes run to the next whitespace. They always take at least one
+# character, so that the lexer moves forward.
+error = r'\S+|\s'
+
+# Dense integer kinds of all token types. The parser uses the same numbers
+# as terminal ids (see grammar_spec).
+token_types = ('ERROR',) + tuple(tokens) + tuple(special_characters) + tuple(reserved_keywords.values())
+token_kinds = {token_type: kind for kind, token_type in enumerate(token_types)}
+ERROR_KIND = token_kinds['ERROR']
+ID_KIND = token_kinds['ID']
+keyword_kinds = {keyword: token_kinds[token_type] for keyword, token_type in reserved_keywords.items()}
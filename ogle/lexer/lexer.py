@@ -1,35 +1,117 @@
+import mmap
 import re
+from ogle.lexer import dfa
 from ogle.lexer.language_spec import *
+from ogle.lexer.source_index import SourceIndex
+
+try:
+    from ogle.lexer import prepass
+except ImportError:
+    # NumPy is optional, the 'numpy' engine is only available with it
+    prepass = None
 
 
 class LexToken(object):
-    def __init__(self, token_type, value, line_number, line_position):
-        self.type = token_type
+    __slots__ = ('kind', 'value', 'offset', 'source')
+
+    def __init__(self, kind, value, offset, source):
+        # Integer kind of the token, see language_spec.token_types
+        self.kind = kind
         self.value = value
-        self.line_number = line_number
-        self.line_position = line_position
+        # Index of the first character of the token in the source
+        self.offset = offset
+        # SourceIndex of the source, which gives the line and line position
+        self.source = source
+
+    @property
+    def type(self):
+        return token_types[self.kind]
+
+    @property
+    def line_number(self):
+        return self.source.line_number(self.offset)
+
+    @property
+    def line_position(self):
+        return self.source.position(self.offset)[1]
 
     def __str__(self):
-        return 'LexToken({0}, {1}, {2}, {3})'.format(self.type, self.value, self.line_number, self.line_position)
+        line_number, line_position = self.source.position(self.offset)
+        return 'LexToken({0}, {1}, {2}, {3})'.format(self.type, self.value, line_number, line_position)
 
     def __repr__(self):
         # return str(self)
         return str(self)
 
     def location(self):
-        return '{}:{}'.format(self.line_number, self.line_position)
+        return '{}:{}'.format(*self.source.position(self.offset))
 
     def lexer_error_message(self):
         return 'Unknown identifier at {}.'.format(self.location())
 
 
+# A token over a bytes source. The value is only decoded when it is read.
+class LazyLexToken(LexToken):
+    __slots__ = ('_end', '_value')
+
+    def __init__(self, kind, start, end, source):
+        self.kind = kind
+        self.offset = start
+        self.source = source
+        self._end = end
+        self._value = None
+
+    @property
+    def value(self):
+        if self._value is None:
+            self._value = str(self.source.text[self.offset:self._end], 'utf-8', 'replace')
+        return self._value
+
+
+def _build_master_regex():
+    # One alternation with a named group per lexeme category. The alternatives
+    # are listed in the same order the 'loop' engine tries them, so the first
+    # alternative that matches is the one the loop would have picked.
+    alternatives = [
+        # Whitespace and line ends are skipped alike, positions come from offsets
+        ('WHITESPACE', '[{}\\n]+'.format(re.escape(whitespace))),
+        ('COMMENT', comments),
+    ]
+    # Token types such as '==' are not valid group names
+    group_kinds = {}
+    for i, (token, regex) in enumerate(tokens.items()):
+        group_name = 'TOKEN_{}'.format(i)
+        group_kinds[group_name] = token_kinds[token]
+        alternatives.append((group_name, regex))
+    alternatives.append(('SPECIAL', '[{}]'.format(re.escape(special_characters))))
+    alternatives.append(('ERROR', error))
+
+    pattern = '|'.join('(?P<{}>{})'.format(name, regex) for name, regex in alternatives)
+    return pattern, group_kinds
+
+
+master_pattern, master_group_kinds = _build_master_regex()
+master_regex = re.compile(master_pattern)
+error_regex = re.compile(error)
+# The same regex for bytes sources
+master_bytes_regex = re.compile(master_pattern.encode('ascii'))
+keyword_kinds_bytes = {k.encode('ascii'): v for k, v in keyword_kinds.items()}
+letters = frozenset(chr(c) for c in range(128) if chr(c).isalpha())
+letters_bytes = frozenset(ord(c) for c in letters)
+token_kinds_bytes = {k.encode('ascii'): v for k, v in token_kinds.items()}
+
+
 class Lexer(object):
-    def __init__(self, input_text):
+    engines = ('regex', 'dfa', 'loop') + (('numpy',) if prepass else ())
+
+    def __init__(self, input_text, engine='regex'):
         self.text = input_text
         self.text_len = len(input_text)
         self.pointer_pos = 0
-        self.line_number = 1
-        self.line_position = 1
+        self.source = SourceIndex(input_text)
+        # Set when the source is a memory-mapped file
+        self._file = None
+        self._mmap = None
         self.line_end = re.compile(line_end)
         self.comments = re.compile(comments)
 
@@ -37,24 +119,243 @@ class Lexer(object):
         for key, value in tokens.items():
             self.token_regex[key] = re.compile(value)
 
+        # Select the scanning engine. Every engine is a generator of
+        # (token kind, start, end) lexemes that yields None once the end of
+        # the file is reached. Engines only track offsets: comments are the
+        # one thing they record, since they restart the line position.
+        if engine == 'numpy' and prepass is None:
+            raise ValueError('Lexer engine numpy needs NumPy to be installed')
+        if not isinstance(input_text, str):
+            # Bytes-like sources (bytes, memoryview) only have regex based engines
+            if engine == 'regex':
+                self.lexemes = self._lexemes_regex(master_bytes_regex)
+            elif engine == 'numpy':
+                self.lexemes = self._lexemes_numpy(master_bytes_regex)
+            else:
+                raise ValueError('Lexer engine {} needs a str source'.format(engine))
+        elif engine == 'numpy':
+            # Byte classes only line up with character offsets in ASCII sources
+            if input_text.isascii():
+                self.lexemes = self._lexemes_numpy(master_regex)
+            else:
+                self.lexemes = self._lexemes_regex(master_regex)
+        elif engine == 'regex':
+            self.lexemes = self._lexemes_regex(master_regex)
+        elif engine == 'dfa':
+            self._dfa = dfa.lexer_dfa()
+            self.lexemes = self._lexemes_dfa()
+        elif engine == 'loop':
+            self.lexemes = self._lexemes_loop()
+        else:
+            raise ValueError('Unknown lexer engine: {}'.format(engine))
+
+    # Creates a lexer over a memory-mapped file. Close the lexer (or use it as
+    # a context manager) to release the mapping. Tokens, nodes and locations
+    # made from it can still be read after that, see close.
+    @classmethod
+    def from_file(cls, path, engine='regex'):
+        file = open(path, 'rb')
+        try:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            file.close()
+            return cls(b'', engine)
+        lexer = cls(memoryview(mapping), engine)
+        lexer._file = file
+        lexer._mmap = mapping
+        return lexer
+
+    # Moves the lexer to the given offset
+    def seek(self, offset):
+        self.pointer_pos = offset
+
+    # Releases the mapping of a lexer made by from_file. The tokens, nodes and
+    # error locations made from this lexer read their values and positions
+    # through the SourceIndex, so it keeps a copy of the source from then on.
+    def close(self):
+        if self._mmap is not None:
+            self.source.text = self.text.tobytes()
+            self.text.release()
+            self.text = self.source.text
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def next_token(self):
+        lexeme = next(self.lexemes)
+        if lexeme is None:
+            # End of file reached
+            return None
+        kind, start, end = lexeme
+        if type(self.text) is str:
+            return LexToken(kind, self.text[start:end], start, self.source)
+        return LazyLexToken(kind, start, end, self.source)
+
+    def all_tokens(self):
+        to_ret = []
+        token = self.next_token()
+        while token:
+            to_ret.append(token)
+            token = self.next_token()
+
+        return to_ret
+
+    # Matches the combined master regex once per lexeme
+    def _lexemes_regex(self, regex):
+        text = self.text
+        is_str = type(text) is str
+        keywords = keyword_kinds if is_str else keyword_kinds_bytes
+        specials = token_kinds if is_str else token_kinds_bytes
+        comment_ends = self.source.comment_ends
+        match_at = regex.match
+        while True:
+            while self.pointer_pos < self.text_len:
+                start = self.pointer_pos
+                match = match_at(text, start)
+                group = match.lastgroup
+                end = self.pointer_pos = match.end()
+
+                if group == 'WHITESPACE':
+                    continue
+                if group == 'COMMENT':
+                    comment_ends.append(end)
+                    continue
+
+                if group == 'SPECIAL':
+                    kind = specials[match.group()]
+                elif group == 'ERROR':
+                    kind = ERROR_KIND
+                else:
+                    kind = master_group_kinds[group]
+                    if kind == ID_KIND:
+                        kind = keywords.get(match.group(), ID_KIND)
+                yield kind, start, end
+
+            # End of file reached
+            yield None
+
+    # Classifies all characters up front with NumPy. Whitespace and identifier
+    # runs come straight from the run boundaries, and only comments, numbers,
+    # operators and errors are matched with the master regex.
+    def _lexemes_numpy(self, regex):
+        text = self.text
+        is_str = type(text) is str
+        keywords = keyword_kinds if is_str else keyword_kinds_bytes
+        specials = token_kinds if is_str else token_kinds_bytes
+        word_starts = letters if is_str else letters_bytes
+        comment_ends = self.source.comment_ends
+        match_at = regex.match
+        run_ends, run_classes = prepass.classify_runs(text.encode('ascii') if is_str else text)
+        run = 0
+        while True:
+            while self.pointer_pos < self.text_len:
+                start = self.pointer_pos
+                while run_ends[run] <= start:
+                    run += 1
+
+                run_class = run_classes[run]
+                if run_class == prepass.SPACE:
+                    self.pointer_pos = run_ends[run]
+                    continue
+                if run_class == prepass.WORD and text[start] in word_starts:
+                    end = self.pointer_pos = run_ends[run]
+                    word = text[start:end] if is_str else bytes(text[start:end])
+                    yield keywords.get(word, ID_KIND), start, end
+                    continue
+
+                match = match_at(text, start)
+                group = match.lastgroup
+                end = self.pointer_pos = match.end()
+                if group == 'COMMENT':
+                    comment_ends.append(end)
+                    continue
+                if group == 'SPECIAL':
+                    kind = specials[match.group()]
+                elif group == 'ERROR':
+                    kind = ERROR_KIND
+                else:
+                    kind = master_group_kinds[group]
+                yield kind, start, end
+
+            # End of file reached
+            yield None
+
+    # Walks the transition table of the lexer DFA, keeping the longest match
+    def _lexemes_dfa(self):
+        text = self.text
+        transitions = self._dfa.transitions
+        char_classes = self._dfa.char_classes
+        accepts = self._dfa.accepts
+        rules = self._dfa.rules
+        comment_ends = self.source.comment_ends
+        other = char_classes[dfa.OTHER_CHARACTER]
+        while True:
+            while self.pointer_pos < self.text_len:
+                start = self.pointer_pos
+                state = 0
+                pos = start
+                rule = -1
+                end = pos
+                while pos < self.text_len:
+                    code = ord(text[pos])
+                    state = transitions[state][char_classes[code] if code < dfa.OTHER_CHARACTER else other]
+                    if state < 0:
+                        break
+                    pos += 1
+                    if accepts[state] >= 0:
+                        rule = accepts[state]
+                        end = pos
+
+                if rule < 0:
+                    # Error found in the next token
+                    # Find all the non-space characters and take them as one token
+                    self.pointer_pos = error_regex.match(text, start).end()
+                    yield ERROR_KIND, start, self.pointer_pos
+                    continue
+
+                self.pointer_pos = end
+                category, kind = rules[rule]
+                if category == dfa.WHITESPACE:
+                    continue
+                if category == dfa.COMMENT:
+                    comment_ends.append(end)
+                    continue
+                yield kind, start, end
+
+            # End of file reached
+            yield None
+
+    # Tries every pattern one after the other for each lexeme
+    def _lexemes_loop(self):
+        while True:
+            yield self._next_lexeme_loop()
+
+    def _next_lexeme_loop(self):
         while self.pointer_pos < self.text_len:
             # Skip any whitespace
             if self.text[self.pointer_pos] in whitespace:
-                self.line_position += 4 if self.text[self.pointer_pos] == '\t' else 1
                 self.pointer_pos += 1
                 continue
 
             # Check for line end character
             match = self.line_end.match(self.text, self.pointer_pos)
             if match:
-                self._new_line_found(match)
+                self.pointer_pos = match.end()
                 continue
 
             # Check for comments
             match = self.comments.match(self.text, self.pointer_pos)
             if match:
-                self._comments_found(match)
+                self.pointer_pos = match.end()
+                self.source.comment_ends.append(self.pointer_pos)
                 continue
 
             # Check for any regex matches in tokens dict
@@ -62,50 +363,25 @@ class Lexer(object):
                 match = regex.match(self.text, self.pointer_pos)
                 if match:
                     # Token found
-                    token_obj = LexToken(token, match.group(), self.line_number, self.line_position)
+                    lexeme = (token_kinds[token], self.pointer_pos, match.end())
                     # Check if the token is a reserved word
-                    if token == 'ID' and token_obj.value in reserved_keywords.keys():
-                        token_obj.type = reserved_keywords[token_obj.value]
+                    if token == 'ID' and match.group() in keyword_kinds:
+                        lexeme = (keyword_kinds[match.group()],) + lexeme[1:]
                     self.pointer_pos = match.end()
-                    self.line_position += len(match.group())
-                    return token_obj
+                    return lexeme
 
             # No match found. Check for special character matches
             if self.text[self.pointer_pos] in special_characters:
-                token_obj = LexToken(self.text[self.pointer_pos],
-                                     self.text[self.pointer_pos],
-                                     self.line_number,
-                                     self.line_position)
+                lexeme = (token_kinds[self.text[self.pointer_pos]], self.pointer_pos, self.pointer_pos + 1)
                 self.pointer_pos += 1
-                self.line_position += 1
-                return token_obj
+                return lexeme
 
             # Error found in the next token
             # Find all the non-space characters and take them as one token
-            match = re.compile(r'\S*').match(self.text, self.pointer_pos)
-            token_obj = LexToken('ERROR', match.group(), self.line_number, self.line_position)
+            match = error_regex.match(self.text, self.pointer_pos)
+            lexeme = (ERROR_KIND, self.pointer_pos, match.end())
             self.pointer_pos = match.end()
-            self.line_position += len(match.group())
-            return token_obj
+            return lexeme
 
         # End of file reached
         return None
-
-    def all_tokens(self):
-        to_ret = []
-        token = self.next_token()
-        while token:
-            to_ret.append(token)
-            token = self.next_token()
-
-        return to_ret
-
-    def _new_line_found(self, match):
-        self.line_number += len(match.group())
-        self.line_position = 1
-        self.pointer_pos = match.end()
-
-    def _comments_found(self, match):
-        self.line_number += match.group().count('\n')
-        self.line_position = 1
-        self.pointer_pos = match.end()
@@ -0,0 +1,95 @@
+import os
+import re
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from ogle.lexer.language_spec import ERROR_KIND
+from ogle.lexer.lexer import Lexer
+from ogle.lexer.source_index import SourceIndex
+from ogle.lexer.token_stream import TokenStream
+
+# Lines that start a class declaration, a function definition or main
+unit_start = re.compile(r'^(?=class\b|main\b|[A-Za-z][A-Za-z_0-9]*[ \t]*(?:::|\())', re.M)
+comment_start = re.compile(r'/\*|//')
+
+# Sources smaller than this are not worth splitting
+MIN_CHUNK_SIZE = 1 << 16
+
+
+# Returns the (start, end) spans of all comments in order, or None when a
+# '/*' is never closed
+def _comment_spans(text):
+    spans = []
+    match = comment_start.search(text)
+    while match:
+        if match.group() == '/*':
+            end = text.find('*/', match.end())
+            if end < 0:
+                return None
+            end += 2
+        else:
+            end = text.find('\n', match.end())
+            end = len(text) if end < 0 else end
+        spans.append((match.start(), end))
+        match = comment_start.search(text, end)
+    return spans
+
+
+# Splits the source into at most chunk_count pieces at the starts of top-level
+# units that are not inside a comment. Returns the chunk start offsets, or None
+# when the comments cannot be told apart.
+def chunk_starts(text, chunk_count, min_chunk_size=MIN_CHUNK_SIZE):
+    spans = _comment_spans(text)
+    if spans is None:
+        return None
+    span_starts = [start for start, _ in spans]
+
+    chunk_size = max(len(text) // max(chunk_count, 1), min_chunk_size)
+    starts = [0]
+    for match in unit_start.finditer(text, chunk_size):
+        offset = match.start()
+        if offset - starts[-1] < chunk_size:
+            continue
+        # Skip unit starts inside a comment
+        comment = bisect_right(span_starts, offset) - 1
+        if comment >= 0 and spans[comment][1] > offset:
+            continue
+        starts.append(offset)
+    return starts
+
+
+def _lex_chunk(arguments):
+    text, engine = arguments
+    lexer = Lexer(text, engine=engine)
+    stream = TokenStream.from_lexer(lexer)
+    return stream.kinds, stream.starts, stream.ends, lexer.source.comment_ends
+
+
+def _lex_serial(text, engine):
+    return TokenStream.from_lexer(Lexer(text, engine=engine))
+
+
+# Lexes a large source in chunks on a pool of worker processes and stitches
+# the results into one TokenStream. Falls back to lexing the source serially
+# when it cannot be split safely, or when a chunk has a lexical error: an
+# error token may swallow a comment opener, which makes the split unsafe.
+def lex_parallel(text, workers=None, engine='regex', min_chunk_size=MIN_CHUNK_SIZE):
+    workers = workers or os.cpu_count() or 1
+    starts = chunk_starts(text, workers, min_chunk_size)
+    if not starts or len(starts) == 1:
+        return _lex_serial(text, engine)
+
+    ends = starts[1:] + [len(text)]
+    chunks = [(text[start:end], engine) for start, end in zip(starts, ends)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+        results = list(executor.map(_lex_chunk, chunks))
+
+    stream = TokenStream(SourceIndex(text))
+    for base, (kinds, token_starts, token_ends, comment_ends) in zip(starts, results):
+        if ERROR_KIND in kinds:
+            return _lex_serial(text, engine)
+        stream.kinds.extend(kinds)
+        stream.starts.extend(array('i', (offset + base for offset in token_starts)))
+        stream.ends.extend(array('i', (offset + base for offset in token_ends)))
+        stream.source.comment_ends.extend(array('i', (offset + base for offset in comment_ends)))
+    return stream
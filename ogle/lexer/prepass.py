@@ -0,0 +1,31 @@
+import numpy as np
+from ogle.lexer.language_spec import whitespace
+
+# Character classes of the pre-pass
+SPACE = 0
+WORD = 1
+OTHER = 2
+
+
+def _class_table():
+    table = np.full(256, OTHER, dtype=np.uint8)
+    for char in whitespace + '\n':
+        table[ord(char)] = SPACE
+    for first, last in (('A', 'Z'), ('a', 'z'), ('0', '9'), ('_', '_')):
+        table[ord(first):ord(last) + 1] = WORD
+    return table
+
+
+class_table = _class_table()
+
+
+# Classifies every byte of an ASCII source at once and splits it into runs of
+# the same class. Returns the run ends and the class of every run as lists.
+def classify_runs(data):
+    if len(data) == 0:
+        return [], []
+    classes = class_table[np.frombuffer(data, dtype=np.uint8)]
+    boundaries = np.flatnonzero(np.diff(classes)) + 1
+    run_ends = np.append(boundaries, len(classes))
+    run_classes = classes[np.insert(boundaries, 0, 0)]
+    return run_ends.tolist(), run_classes.tolist()
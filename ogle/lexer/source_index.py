@@ -0,0 +1,48 @@
+import re
+from array import array
+from bisect import bisect_right
+
+newline_regex = re.compile(b'\n')
+
+
+# Turns source offsets into (line number, line position) pairs.
+# Positions count tabs as 4 characters and restart at 1 after every line end
+# and every comment. The line table is only built on the first query.
+class SourceIndex(object):
+    def __init__(self, text):
+        self.text = text
+        # Offsets of the first character of every line
+        self._line_starts = None
+        # Offsets right after every comment, recorded by the lexer
+        self.comment_ends = array('i')
+
+    def _build_line_starts(self):
+        line_starts = array('i', [0])
+        if type(self.text) is str:
+            find = self.text.find
+            pos = find('\n')
+            while pos >= 0:
+                line_starts.append(pos + 1)
+                pos = find('\n', pos + 1)
+        else:
+            # memoryview has no find()
+            for match in newline_regex.finditer(self.text):
+                line_starts.append(match.end())
+        self._line_starts = line_starts
+
+    def line_number(self, offset):
+        if self._line_starts is None:
+            self._build_line_starts()
+        return bisect_right(self._line_starts, offset)
+
+    def position(self, offset):
+        line_number = self.line_number(offset)
+        column_start = self._line_starts[line_number - 1]
+        comment = bisect_right(self.comment_ends, offset)
+        if comment and self.comment_ends[comment - 1] > column_start:
+            column_start = self.comment_ends[comment - 1]
+
+        segment = self.text[column_start:offset]
+        if type(segment) is not str:
+            segment = str(segment, 'utf-8', 'replace')
+        return line_number, 1 + len(segment) + 3 * segment.count('\t')
@@ -0,0 +1,73 @@
+from array import array
+from ogle.lexer.language_spec import token_types
+from ogle.lexer.lexer import LexToken, LazyLexToken
+
+
+# Stores the tokens of a source in parallel integer columns instead of one
+# LexToken per token. LexToken objects are only created when a token is read.
+# Line numbers and positions are not stored: the SourceIndex of the source
+# computes them from the start offsets when they are asked for.
+class TokenStream(object):
+    def __init__(self, source):
+        self.source = source
+        self.kinds = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        # Index of the token returned by the next call to next_token
+        self.position = 0
+
+    @classmethod
+    def from_lexer(cls, lexer):
+        stream = cls(lexer.source)
+        kinds_append = stream.kinds.append
+        starts_append = stream.starts.append
+        ends_append = stream.ends.append
+
+        lexemes = lexer.lexemes
+        lexeme = next(lexemes)
+        while lexeme is not None:
+            kind, start, end = lexeme
+            kinds_append(kind)
+            starts_append(start)
+            ends_append(end)
+            lexeme = next(lexemes)
+        return stream
+
+    # The text is read through the SourceIndex, which keeps a copy of the
+    # source once the lexer of a mapped file is closed
+    @property
+    def text(self):
+        return self.source.text
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        start = self.starts[index]
+        if type(self.text) is str:
+            return LexToken(self.kinds[index], self.text[start:self.ends[index]], start, self.source)
+        return LazyLexToken(self.kinds[index], start, self.ends[index], self.source)
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+    def type_of(self, index):
+        return token_types[self.kinds[index]]
+
+    # Same as Lexer.next_token, so a stream can be handed to the Parser
+    def next_token(self):
+        if self.position >= len(self.kinds):
+            return None
+        self.position += 1
+        return self[self.position - 1]
+
+    # Returns up to n tokens from the current position
+    def next_tokens(self, n):
+        end = min(self.position + n, len(self.kinds))
+        to_ret = [self[i] for i in range(self.position, end)]
+        self.position = end
+        return to_ret
+
+    def rewind(self):
+        self.position = 0
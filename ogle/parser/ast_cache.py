@@ -0,0 +1,245 @@
+import hashlib
+import importlib
+import os
+import struct
+import sys
+import zlib
+from array import array
+from ogle.ast.ast import AST
+from ogle.ast.ast_arena import node_types
+from ogle.ast.ast_node import Node
+from ogle.lexer.lexer import Lexer
+from ogle.parser.parser import Parser, load_grammar
+
+# Bump when the layout of the cache files changes so that old entries are
+# parsed again
+CACHE_FORMAT_VERSION = 1
+DEFAULT_MAX_SIZE = 64 * 2 ** 20
+
+_magic = b'OGLEAST'
+# Magic, format version, byte order of the arrays, then the number of strings,
+# nodes and errors
+_header = struct.Struct('<7sHcIII')
+_byte_order = b'l' if sys.byteorder == 'little' else b'b'
+_suffix = '.ast'
+_node_type_indices = {node_type: index for index, node_type in enumerate(node_types)}
+
+# The packages whose code decides the AST and the errors of a source: the
+# lexer with the token kinds, the grammar, the parsers with their error
+# messages and recovery, and the semantic actions and node types. All their
+# modules are hashed, so a helper module that is added later is covered too.
+_parsing_packages = ('ogle.lexer', 'ogle.parser', 'ogle.ast')
+_code_digest = None
+
+
+# Returns the hash of the code of the parsing packages, computed once per
+# process
+def code_digest():
+    global _code_digest
+    if _code_digest is None:
+        digest = hashlib.sha256()
+        for name in _parsing_packages:
+            directory = os.path.dirname(importlib.import_module(name).__file__)
+            for file_name in sorted(os.listdir(directory)):
+                if not file_name.endswith('.py'):
+                    continue
+                digest.update(file_name.encode('utf-8') + b'\0')
+                with open(os.path.join(directory, file_name), 'rb') as file:
+                    digest.update(file.read())
+        _code_digest = digest.hexdigest()
+    return _code_digest
+
+
+# Encodes the AST under root and the errors of its parse. The nodes are laid
+# out in preorder in parallel arrays, like a compacted ASTArena, with their
+# number of children instead of links and their locations instead of offsets.
+# Names, values and errors are interned in one string table. The root is None,
+# and there are no nodes, when the input could not start the program.
+def encode_ast(root, errors):
+    strings = {}
+    kinds = array('b')
+    names = array('i')
+    values = array('i')
+    lines = array('i')
+    columns = array('i')
+    child_counts = array('I')
+    pending = [root] if root is not None else []
+    while pending:
+        node = pending.pop()
+        kinds.append(_node_type_indices[node.node_type])
+        names.append(strings.setdefault(node.name, len(strings)))
+        values.append(strings.setdefault(node.value, len(strings)))
+        line, column = node.location or (0, 0)
+        lines.append(line)
+        columns.append(column)
+        child_counts.append(len(node.children))
+        pending.extend(reversed(node.children))
+    error_ids = array('i', (strings.setdefault(error, len(strings)) for error in errors))
+
+    encoded_strings = [string.encode('utf-8') for string in strings]
+    string_lengths = array('I', (len(string) for string in encoded_strings))
+    body = b''.join([string_lengths.tobytes(), b''.join(encoded_strings), kinds.tobytes(), names.tobytes(),
+                     values.tobytes(), lines.tobytes(), columns.tobytes(), child_counts.tobytes(),
+                     error_ids.tobytes()])
+    header = _header.pack(_magic, CACHE_FORMAT_VERSION, _byte_order, len(strings), len(kinds), len(errors))
+    return header + zlib.compress(body, 1)
+
+
+# Decodes what encode_ast returned into a finished AST and the errors. Raises
+# ValueError when the data was not encoded by this version.
+def decode_ast(data):
+    try:
+        magic, version, byte_order, string_count, node_count, error_count = _header.unpack_from(data)
+        body = memoryview(zlib.decompress(data[_header.size:]))
+    except (struct.error, zlib.error) as error:
+        raise ValueError('Not an encoded AST') from error
+    if magic != _magic or version != CACHE_FORMAT_VERSION or byte_order != _byte_order:
+        raise ValueError('Not an encoded AST of this version')
+
+    position = 0
+
+    def read(typecode, count):
+        nonlocal position
+        column = array(typecode)
+        size = column.itemsize * count
+        column.frombytes(body[position:position + size])
+        position += size
+        return column
+
+    string_lengths = read('I', string_count)
+    strings = []
+    for length in string_lengths:
+        strings.append(str(body[position:position + length], 'utf-8'))
+        position += length
+    kinds = read('b', node_count)
+    names = read('i', node_count)
+    values = read('i', node_count)
+    lines = read('i', node_count)
+    columns = read('i', node_count)
+    child_counts = read('I', node_count)
+    error_ids = read('i', error_count)
+    if position != len(body):
+        raise ValueError('Not an encoded AST of this version')
+
+    # Going backwards through the preorder, the children of every node are
+    # the last nodes made, in reverse order
+    made = []
+    for index in range(node_count - 1, -1, -1):
+        line = lines[index]
+        node = Node(strings[names[index]], strings[values[index]], (line, columns[index]) if line else None,
+                    node_type=node_types[kinds[index]])
+        count = child_counts[index]
+        if count:
+            node.children = tuple(made[:-count - 1:-1])
+            del made[-count:]
+        else:
+            node.children = ()
+        made.append(node)
+    ast = AST()
+    ast.root = made[0] if made else None
+    ast.ignore_input = True
+    return ast, [strings[error_id] for error_id in error_ids]
+
+
+# A cache of parsed ASTs in a directory, in front of the lexer and the parser.
+# Entries are keyed by a hash of the source, the grammar and the code of the
+# parsing packages, so changing any of them parses the sources again. The least
+# recently used entries are removed once the entries take more than max_size
+# bytes.
+class ASTCache(object):
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE, engine='iterative'):
+        self.directory = directory
+        self.max_size = max_size
+        self.engine = engine
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(data):
+        digest = hashlib.sha256()
+        digest.update(load_grammar().digest.encode('ascii'))
+        digest.update(code_digest().encode('ascii'))
+        digest.update(b'\0')
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _suffix)
+
+    # Returns the AST and the errors of the source text
+    def parse(self, text):
+        return self._parse(text.encode('utf-8'), text)
+
+    # Returns the AST and the errors of the source file
+    def parse_file(self, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+        return self._parse(data, data)
+
+    def _parse(self, data, text):
+        key = self.key(data)
+        to_ret = self.load(key)
+        if to_ret is not None:
+            self.hits += 1
+            return to_ret
+
+        self.misses += 1
+        parser = Parser(Lexer(text), engine=self.engine, build_parse_tree=False)
+        parser.parse()
+        self.store(key, parser.ast, parser.errors)
+        return parser.ast, parser.errors
+
+    # Returns the AST and the errors of the entry, or None when there is none
+    def load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            to_ret = decode_ast(data)
+        except (OSError, ValueError):
+            return None
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return to_ret
+
+    def store(self, key, ast, errors):
+        path = self._path(key)
+        temp_path = '{}.{}.tmp'.format(path, os.getpid())
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(encode_ast(ast.root, errors))
+            os.replace(temp_path, path)
+        except OSError:
+            # The cache is only an optimization
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self.evict()
+
+    # Removes the least recently used entries until they fit in max_size
+    def evict(self):
+        entries = []
+        total_size = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if not entry.name.endswith(_suffix):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, entry.path, stat.st_size))
+                total_size += stat.st_size
+        entries.sort()
+        for _, path, size in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
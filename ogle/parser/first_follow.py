@@ -0,0 +1,190 @@
+from collections import deque
+from ogle.parser.grammar_spec import END_OF_INPUT, terminal_count, terminal_ids
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional, the 'numpy' engine is only available with it
+    np = None
+
+# First and follow sets are integers with one bit per terminal id. The bit
+# right after the terminal ids stands for epsilon.
+EPSILON = 1 << terminal_count
+
+engines = ('bitset',) + (('numpy',) if np else ())
+
+
+# Maps every symbol to the (rule number, position) pairs where it occurs
+def occurrence_index(rules):
+    occurrences = {}
+    for rule_number, (_, symbols) in enumerate(rules):
+        for position, symbol in enumerate(symbols):
+            occurrences.setdefault(symbol, []).append((rule_number, position))
+    return occurrences
+
+
+# Returns the first set of a sequence of symbols
+def sequence_first(symbols, first):
+    to_ret = 0
+    for symbol in symbols:
+        bits = first[symbol]
+        to_ret |= bits & ~EPSILON
+        if not bits & EPSILON:
+            return to_ret
+    return to_ret | EPSILON
+
+
+# Computes the first and follow sets of every symbol of the rules. 'rules' is
+# a list of (lhs, symbols) without semantic actions, where an epsilon rule has
+# no symbols. Returns two dicts from symbol to bitset.
+def first_follow_sets(rules, start, engine='bitset'):
+    if engine == 'numpy':
+        if np is None:
+            raise ValueError('First/follow engine numpy needs NumPy to be installed')
+        return _first_follow_numpy(rules, start)
+    if engine != 'bitset':
+        raise ValueError('Unknown first/follow engine: {}'.format(engine))
+    first = _first_sets(rules)
+    return first, _follow_sets(rules, start, first)
+
+
+def _symbols(rules):
+    symbols = {}
+    for lhs, rule_symbols in rules:
+        symbols[lhs] = None
+        for symbol in rule_symbols:
+            symbols[symbol] = None
+    return list(symbols)
+
+
+# Fixed-point iteration on a worklist of non-terminals. When the first set of
+# a symbol grows, only the rules it occurs in are queued again.
+def _first_sets(rules):
+    rules_by_lhs = {}
+    for lhs, symbols in rules:
+        rules_by_lhs.setdefault(lhs, []).append(symbols)
+    first = {symbol: 1 << terminal_ids[symbol] if symbol in terminal_ids else 0 for symbol in _symbols(rules)}
+    occurrences = occurrence_index(rules)
+
+    worklist = deque(rules_by_lhs)
+    queued = set(rules_by_lhs)
+    while worklist:
+        lhs = worklist.popleft()
+        queued.discard(lhs)
+        bits = first[lhs]
+        for symbols in rules_by_lhs[lhs]:
+            bits |= sequence_first(symbols, first)
+        if bits == first[lhs]:
+            continue
+        first[lhs] = bits
+        for rule_number, _ in occurrences.get(lhs, ()):
+            dependent = rules[rule_number][0]
+            if dependent not in queued:
+                queued.add(dependent)
+                worklist.append(dependent)
+    return first
+
+
+# Every occurrence adds the first set of what follows it. When the rest of the
+# rule can vanish, the follow set of the lhs flows into the symbol, which is
+# propagated on a worklist until nothing changes.
+def _follow_sets(rules, start, first):
+    follow = {symbol: 0 for symbol in _symbols(rules)}
+    follow[start] = 1 << END_OF_INPUT
+    # The symbols that get the follow set of every lhs
+    flows = {}
+    for lhs, symbols in rules:
+        rest = EPSILON
+        for symbol in reversed(symbols):
+            follow[symbol] |= rest & ~EPSILON
+            if rest & EPSILON and symbol != lhs:
+                flows.setdefault(lhs, set()).add(symbol)
+            bits = first[symbol]
+            rest = (bits & ~EPSILON) | (rest if bits & EPSILON else 0)
+
+    worklist = deque(flows)
+    queued = set(flows)
+    while worklist:
+        lhs = worklist.popleft()
+        queued.discard(lhs)
+        for symbol in flows[lhs]:
+            bits = follow[symbol] | follow[lhs]
+            if bits != follow[symbol]:
+                follow[symbol] = bits
+                if symbol in flows and symbol not in queued:
+                    queued.add(symbol)
+                    worklist.append(symbol)
+    return follow
+
+
+# Returns the least sets with sets[i] = seeds[i] | the sets[j] of every j
+# with matrix[i, j], by propagating along the matrix until nothing changes
+def _propagate(matrix, seeds):
+    # float32 products go through BLAS and are exact for these sizes
+    matrix = matrix.astype(np.float32)
+    sets = seeds
+    while True:
+        grown = seeds | ((matrix @ sets.astype(np.float32)) > 0)
+        if np.array_equal(grown, sets):
+            return sets
+        sets = grown
+
+
+def _to_bitsets(symbols, matrix):
+    packed = np.packbits(matrix, axis=1, bitorder='little')
+    return {symbol: int.from_bytes(packed[i].tobytes(), 'little') for i, symbol in enumerate(symbols)}
+
+
+# Same sets as the bitset engine, computed with boolean matrix products over
+# all symbols at once: first sets propagate along the leading symbols of the
+# rules, and follow sets along the flows from lhs to trailing symbols
+def _first_follow_numpy(rules, start):
+    symbols = _symbols(rules)
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    size = len(symbols)
+
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rule_symbols in rules:
+            if lhs not in nullable and all(symbol in nullable for symbol in rule_symbols):
+                nullable.add(lhs)
+                changed = True
+
+    # leading[A, B] is set when B can start a rule of A, terminals start themselves
+    leading = np.zeros((size, size), dtype=bool)
+    terminal_columns = np.zeros((size, terminal_count + 1), dtype=bool)
+    for symbol in symbols:
+        if symbol in terminal_ids:
+            terminal_columns[index[symbol], terminal_ids[symbol]] = True
+    for lhs, rule_symbols in rules:
+        for symbol in rule_symbols:
+            leading[index[lhs], index[symbol]] = True
+            if symbol not in nullable:
+                break
+    first_matrix = _propagate(leading, terminal_columns)
+    for symbol in nullable:
+        first_matrix[index[symbol], terminal_count] = True
+
+    direct = np.zeros((size, terminal_count + 1), dtype=bool)
+    direct[index[start], END_OF_INPUT] = True
+    # flows[B, A] is set when the follow set of A flows into B
+    flows = np.zeros((size, size), dtype=bool)
+    for lhs, rule_symbols in rules:
+        rest = np.zeros(terminal_count + 1, dtype=bool)
+        rest_nullable = True
+        for symbol in reversed(rule_symbols):
+            direct[index[symbol]] |= rest
+            if rest_nullable:
+                flows[index[symbol], index[lhs]] = True
+            row = first_matrix[index[symbol], :terminal_count]
+            if symbol in nullable:
+                rest = rest.copy()
+                rest[:terminal_count] |= row
+            else:
+                rest = np.append(row, False)
+                rest_nullable = False
+    follow_matrix = _propagate(flows, direct)
+
+    return _to_bitsets(symbols, first_matrix), _to_bitsets(symbols, follow_matrix)
@@ -0,0 +1,135 @@
+from ogle.parser.first_follow import EPSILON, first_follow_sets, sequence_first
+from ogle.parser.grammar_spec import terminal_count, terminal_ids, terminal_names
+
+
+def bit_names(bits):
+    return sorted(terminal_names[i] for i in range(terminal_count) if bits >> i & 1)
+
+
+# Finds the problems of a grammar that the LL(1) parse table hides: the table
+# silently keeps the first matching rule when rules overlap.
+class GrammarAnalyzer(object):
+    def __init__(self, grammar):
+        self.grammar = grammar
+        self.non_terminals = [name for name, state in grammar.states.items() if not state.is_terminal]
+        # The rules of every non-terminal without semantic actions, [] for epsilon
+        self.rules = {}
+        for name in self.non_terminals:
+            state = grammar.states[name]
+            self.rules[name] = list(state.rhs_no_action) + ([[]] if '#' in state.rhs else [])
+        all_rules = [(name, symbols) for name in self.non_terminals for symbols in self.rules[name]]
+        self.first, self.follow = first_follow_sets(all_rules, grammar.start_state)
+
+    # Returns (non-terminal, rule, other rule, shared terminals) for every pair
+    # of rules that can start with the same terminal, or that can both derive
+    # epsilon. EPSILON is then listed with the shared terminals.
+    def first_first_conflicts(self):
+        conflicts = []
+        for name in self.non_terminals:
+            rules = self.rules[name]
+            firsts = [sequence_first(rule, self.first) for rule in rules]
+            for i in range(len(rules)):
+                for j in range(i + 1, len(rules)):
+                    shared = firsts[i] & firsts[j]
+                    if shared:
+                        names = bit_names(shared & ~EPSILON) + (['EPSILON'] if shared & EPSILON else [])
+                        conflicts.append((name, rules[i], rules[j], names))
+        return conflicts
+
+    # Returns (non-terminal, rule, shared terminals) for every rule of a
+    # nullable non-terminal that can start with a terminal of its follow set
+    def first_follow_conflicts(self):
+        conflicts = []
+        for name in self.non_terminals:
+            if not self.first[name] & EPSILON:
+                continue
+            for rule in self.rules[name]:
+                shared = sequence_first(rule, self.first) & self.follow[name] & ~EPSILON
+                if shared:
+                    conflicts.append((name, rule, bit_names(shared)))
+        return conflicts
+
+    def unreachable(self):
+        reached = {self.grammar.start_state}
+        pending = [self.grammar.start_state]
+        while pending:
+            for rule in self.rules.get(pending.pop(), ()):
+                for symbol in rule:
+                    if symbol not in reached:
+                        reached.add(symbol)
+                        pending.append(symbol)
+        return [name for name in self.non_terminals if name not in reached]
+
+    # Non-terminals that cannot derive any string of terminals
+    def unproductive(self):
+        productive = set(terminal_ids)
+        changed = True
+        while changed:
+            changed = False
+            for name in self.non_terminals:
+                if name not in productive and \
+                        any(all(symbol in productive for symbol in rule) for rule in self.rules[name]):
+                    productive.add(name)
+                    changed = True
+        return [name for name in self.non_terminals if name not in productive]
+
+    # Returns (filled entries, all entries) of the parse table
+    def table_density(self):
+        return len(self.grammar.parse_table), len(self.non_terminals) * terminal_count
+
+    # Maps every nullable non-terminal to the depth of its shallowest epsilon
+    # derivation: 1 for an epsilon rule, 1 + the deepest symbol otherwise
+    def epsilon_chain_depths(self):
+        depths = {}
+        changed = True
+        while changed:
+            changed = False
+            for name in self.non_terminals:
+                for rule in self.rules[name]:
+                    if not all(symbol in depths for symbol in rule):
+                        continue
+                    depth = 1 + max((depths[symbol] for symbol in rule), default=0)
+                    if depth < depths.get(name, depth + 1):
+                        depths[name] = depth
+                        changed = True
+        return depths
+
+    def has_problems(self):
+        return bool(self.first_first_conflicts() or self.first_follow_conflicts() or
+                    self.unreachable() or self.unproductive())
+
+    def report(self):
+        to_ret = ''
+        first_first = self.first_first_conflicts()
+        to_ret += f'FIRST/FIRST conflicts: {len(first_first)}\n'
+        for name, rule, other_rule, shared in first_first:
+            to_ret += f'\t{name} -> {_rule_str(rule)} | {_rule_str(other_rule)} on {", ".join(shared)}\n'
+
+        first_follow = self.first_follow_conflicts()
+        to_ret += f'FIRST/FOLLOW conflicts: {len(first_follow)}\n'
+        for name, rule, shared in first_follow:
+            to_ret += f'\t{name} -> {_rule_str(rule)} on {", ".join(shared)}\n'
+
+        unreachable = self.unreachable()
+        to_ret += f'Unreachable non-terminals: {len(unreachable)}\n'
+        for name in unreachable:
+            to_ret += f'\t{name}\n'
+
+        unproductive = self.unproductive()
+        to_ret += f'Unproductive non-terminals: {len(unproductive)}\n'
+        for name in unproductive:
+            to_ret += f'\t{name}\n'
+
+        filled, total = self.table_density()
+        to_ret += f'Parse table: {filled} of {total} entries ({len(self.non_terminals)} non-terminals x ' \
+                  f'{terminal_count} terminals), density {filled / total:.1%}\n'
+
+        depths = self.epsilon_chain_depths()
+        to_ret += f'Epsilon-chain depths: {len(depths)} nullable non-terminals\n'
+        for name in sorted(depths, key=lambda name: (-depths[name], name)):
+            to_ret += f'\t{name}: {depths[name]}\n'
+        return to_ret
+
+
+def _rule_str(rule):
+    return ' '.join(rule) if rule else 'EPSILON'
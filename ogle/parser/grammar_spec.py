@@ -1,4 +1,4 @@
-from ogle.lexer.language_spec import reserved_keywords
+from ogle.lexer.language_spec import reserved_keywords, token_kinds, token_types
 
 
 # A map from terminals to token types
@@ -34,3 +34,20 @@ terminals.update({
 })
 
 tokens_to_terminals = {v: k for k, v in terminals.items()}
+
+# Every terminal's id is the kind of its token, so the lexer's output needs no
+# translation. The end of the input gets the id right after the last kind.
+END_OF_INPUT = len(token_types)
+terminal_count = END_OF_INPUT + 1
+terminal_ids = {name: token_kinds[token_type] for name, token_type in terminals.items()}
+terminal_ids['$'] = END_OF_INPUT
+terminal_names = {terminal_id: name for name, terminal_id in terminal_ids.items()}
+
+
+# Returns a bytearray indexed by terminal id, set for the given terminal names
+def terminal_id_set(names):
+    to_ret = bytearray(terminal_count)
+    for name in names:
+        if name in terminal_ids:
+            to_ret[terminal_ids[name]] = 1
+    return to_ret
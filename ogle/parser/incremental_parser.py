@@ -0,0 +1,201 @@
+from ogle.ast.ast import AST, MAKE_RIGHT_CHILD, decode_action
+from ogle.ast.ast_node import Node
+from ogle.lexer.language_spec import ERROR_KIND
+from ogle.lexer.lexer import Lexer
+from ogle.lexer.token_stream import TokenStream
+from ogle.parser.grammar_spec import END_OF_INPUT, terminal_ids
+from ogle.parser.parser import Parser
+
+# The kinds of top-level units of PROGRAM, in the order they can appear
+CLASS_UNIT = 'CLASS_DECLARATION'
+FUNCTION_UNIT = 'FUNCTION_DEFINITION'
+MAIN_UNIT = 'main'
+
+_main_id = terminal_ids['main']
+
+
+# A top-level unit of the last parse: its kind, the range of its tokens and
+# the subtree that was built from them. The start offsets of its tokens are
+# kept to move the offsets of its nodes when it is reused.
+class Unit(object):
+    __slots__ = ('kind', 'start', 'end', 'node', 'token_starts')
+
+    def __init__(self, kind, start, end, node, stream):
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.node = node
+        self.token_starts = stream.starts[start:end]
+
+
+# Parses successive versions of a source and reuses the subtrees of the class
+# declarations, function definitions and main that did not change.
+#
+# Every version is lexed in full. The tokens are compared with the tokens of
+# the last version, and the units whose tokens are all in the common prefix or
+# the common suffix are spliced back in by identity, with their offsets moved
+# to the new source. Only the units in between are parsed again. A unit is
+# parsed the same way wherever it is, so the AST is the same as the AST of a
+# full parse.
+#
+# Units are only reused from a parse without errors, and any lexer or syntax
+# error falls back to a full parse, so the errors are the same as Parser's.
+class IncrementalParser(object):
+    def __init__(self):
+        self.ast = None
+        self.errors = []
+        # The number of units reused and parsed again by the last parse
+        self.reused_units = 0
+        self.parsed_units = 0
+        self._stream = None
+        self._units = []
+
+    def parse(self, text):
+        stream = TokenStream.from_lexer(Lexer(text))
+        if ERROR_KIND in stream.kinds:
+            return self._parse_full(stream)
+
+        old_units = self._units
+        prefix, suffix = self._common_tokens(stream)
+        shift = len(stream) - len(self._stream) if self._stream is not None else 0
+        head = [unit for unit in old_units if unit.end <= prefix]
+        tail = [unit for unit in old_units[len(head):] if unit.start >= len(self._stream) - suffix]
+
+        start = head[-1].end if head else 0
+        end = tail[0].start + shift if tail else len(stream)
+        parsed = self._parse_units(stream, start, end)
+        if parsed is None or not _in_program_order(head + parsed + tail):
+            return self._parse_full(stream)
+        units = [self._moved(unit, 0, stream) for unit in head] + parsed + \
+            [self._moved(unit, shift, stream) for unit in tail]
+
+        self._stream = stream
+        self._units = units
+        self.ast = self._build_program(units)
+        self.errors = []
+        self.reused_units = len(head) + len(tail)
+        self.parsed_units = len(parsed)
+        return self.ast
+
+    def _parse_full(self, stream):
+        stream.rewind()
+        parser = Parser(stream, build_parse_tree=False)
+        parser.parse()
+        self._stream = stream
+        self._units = []
+        self.ast = parser.ast
+        self.errors = parser.errors
+        self.reused_units = 0
+        self.parsed_units = 0
+        return self.ast
+
+    # Returns the number of tokens that the stream has in common with the last
+    # stream at the start and at the end, without overlapping
+    def _common_tokens(self, stream):
+        old = self._stream
+        if old is None:
+            return 0, 0
+        limit = min(len(old), len(stream))
+        prefix = 0
+        while prefix < limit and _same_token(old, prefix, stream, prefix):
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and _same_token(old, len(old) - suffix - 1, stream, len(stream) - suffix - 1):
+            suffix += 1
+        return prefix, suffix
+
+    # Moves the unit to the new stream. The tokens of the unit are the same,
+    # only their offsets and source change.
+    @staticmethod
+    def _moved(unit, shift, stream):
+        start = unit.start + shift
+        offsets = dict(zip(unit.token_starts, stream.starts[start:unit.end + shift]))
+        nodes = [unit.node]
+        while nodes:
+            node = nodes.pop()
+            if node.offset is not None:
+                node.offset = offsets[node.offset]
+                node.source = stream.source
+            nodes.extend(node.children)
+        return Unit(unit.kind, start, unit.end + shift, unit.node, stream)
+
+    # Parses the units of the tokens from start to end. Returns None when they
+    # are not a sequence of units without errors.
+    def _parse_units(self, stream, start, end):
+        if start == end:
+            return []
+        stream.position = start
+        parser = Parser(stream, build_parse_tree=False)
+        states = parser._grammar.states
+        parser._next_token()
+        units = []
+        position = start
+        while position < end:
+            lookahead = parser._lookahead
+            if states[CLASS_UNIT].first_ids[lookahead]:
+                kind = CLASS_UNIT
+                parser._parse_iterative(states[CLASS_UNIT], None)
+            elif states[FUNCTION_UNIT].first_ids[lookahead]:
+                kind = FUNCTION_UNIT
+                parser._parse_iterative(states[FUNCTION_UNIT], None)
+            elif lookahead == _main_id:
+                # main FUNCTION_BODY #2 of the PROGRAM rule
+                kind = MAIN_UNIT
+                parser._match_terminal()
+                if not states['FUNCTION_BODY'].first_ids[parser._lookahead]:
+                    return None
+                parser._parse_iterative(states['FUNCTION_BODY'], None)
+                parser.ast.perform_action((MAKE_RIGHT_CHILD, None, None))
+            else:
+                return None
+            if parser.errors:
+                return None
+            # The lookahead is the token after the unit
+            unit_end = stream.position - 1 if parser._lookahead != END_OF_INPUT else len(stream)
+            if unit_end > end:
+                return None
+            units.append(Unit(kind, position, unit_end, parser.ast.stack.pop(), stream))
+            position = unit_end
+            # Like the parser, the tokens after main are not checked
+            if kind == MAIN_UNIT:
+                break
+        return units
+
+    # Builds the PROGRAM node like the semantic actions of the PROGRAM,
+    # CLASS_DECLARATIONS and FUNCTION_DEFINITIONS rules do
+    @staticmethod
+    def _build_program(units):
+        ast = AST()
+        program = _make_node('PROGRAM')
+        classes = _make_node('CLASS_DECLARATIONS')
+        functions = _make_node('FUNCTION_DEFINITIONS')
+        for unit in units:
+            if unit.kind == CLASS_UNIT:
+                classes.make_right_child(unit.node)
+            elif unit.kind == FUNCTION_UNIT:
+                functions.make_right_child(unit.node)
+        program.make_right_child(classes)
+        program.make_right_child(functions)
+        program.make_right_child(units[-1].node)
+        ast.stack.append(program)
+        ast.finish_building()
+        return ast
+
+
+# Checks that the units are the classes, then the functions, then main
+def _in_program_order(units):
+    order = [CLASS_UNIT, FUNCTION_UNIT, MAIN_UNIT]
+    ranks = [order.index(unit.kind) for unit in units]
+    return ranks == sorted(ranks) and ranks.count(2) == 1 and ranks[-1] == 2
+
+
+def _same_token(stream, index, other, other_index):
+    return stream.kinds[index] == other.kinds[other_index] and \
+        stream.text[stream.starts[index]:stream.ends[index]] == \
+        other.text[other.starts[other_index]:other.ends[other_index]]
+
+
+def _make_node(name):
+    _, name, node_type = decode_action('#1', name)
+    return Node(name, node_type=node_type)
+
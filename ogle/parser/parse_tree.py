@@ -1,4 +1,6 @@
 class ParseNode(object):
+    __slots__ = ('name', 'children', 'deleted')
+
     def __init__(self, name):
         self.name = name
         self.children = []
@@ -10,21 +12,46 @@ class ParseNode(object):
         self.children.append(child)
 
 
+# Records the leftmost derivation of the parse as one step per expanded or
+# deleted leaf. The sentential forms are only rendered when they are read.
 class ParseTree(object):
     def __init__(self, root_name):
         self.root = ParseNode(root_name)
-        self.derivation_list = []
+        # The leaves that were replaced by their children or deleted, in order
+        self.steps = []
+
+    # Replaces the leaf with the symbols of a production
+    def expand(self, node, symbols):
+        for symbol in symbols:
+            node.children.append(ParseNode(symbol))
+        self.steps.append(node)
+
+    # Removes a leaf that resolved to epsilon
+    def delete(self, node):
+        node.deleted = True
+        self.steps.append(node)
 
-    def add_derivation(self):
-        self.derivation_list.append(self.obtain_derivation(self.root))
+    # Yields the sentential form after every step
+    def derivations(self):
+        nodes = [self.root]
+        names = [self.root.name + ' ']
+        # The parse goes from left to right, so every step is on a leaf at or
+        # after the previous one
+        position = 0
+        for node in self.steps:
+            position = nodes.index(node, position)
+            if node.deleted:
+                del nodes[position]
+                del names[position]
+            else:
+                nodes[position:position + 1] = node.children
+                names[position:position + 1] = [child.name + ' ' for child in node.children]
+            yield ''.join(names)
 
-    def obtain_derivation(self, node):
-        if node.deleted:
-            return ''
-        if not node.children:
-            return node.name + ' '
+    @property
+    def derivation_list(self):
+        return list(self.derivations())
 
-        to_ret = ''
-        for child in node.children:
-            to_ret += self.obtain_derivation(child)
-        return to_ret
+    def write_derivations(self, output_file):
+        for derivation in self.derivations():
+            output_file.write(derivation + '\n')
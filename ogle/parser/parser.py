@@ -1,7 +1,53 @@
+import hashlib
+import importlib
 import os
-from ogle.parser.grammar_spec import terminals, tokens_to_terminals
-from ogle.ast.ast import AST, terminal_nodes
-from ogle.parser.parse_tree import ParseTree, ParseNode
+import pickle
+from ogle.lexer.language_spec import ERROR_KIND, token_types
+from ogle.parser.first_follow import EPSILON, first_follow_sets
+from ogle.parser.grammar_spec import END_OF_INPUT, terminal_count, terminals, terminal_ids, terminal_id_set, terminal_names
+from ogle.ast.ast import AST, decode_action, terminal_node_ids, terminal_node_types
+from ogle.ast.ast_node import NodeType, node_name_to_type
+from ogle.parser.parse_tree import ParseTree
+
+
+grammar_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'data', 'grammar', 'LL1Grammar.grm')
+# The modules whose code builds a compiled grammar: the token kinds and
+# terminal ids, the first/follow sets, the decoded semantic actions and node
+# types, and Grammar, State and Production with the parse table and sync sets
+grammar_modules = ('ogle.lexer.language_spec', 'ogle.parser.grammar_spec', 'ogle.parser.first_follow',
+                   'ogle.ast.ast', 'ogle.ast.ast_node', 'ogle.parser.parser')
+# Hashes of the code of modules, by tuple of module names
+_code_digests = {}
+
+
+# Returns a hash of the source files of the modules, computed once per process
+def code_digest(module_names):
+    to_ret = _code_digests.get(module_names)
+    if to_ret is None:
+        digest = hashlib.sha256()
+        for name in module_names:
+            with open(importlib.import_module(name).__file__, 'rb') as file:
+                digest.update(file.read())
+        to_ret = _code_digests[module_names] = digest.hexdigest()
+    return to_ret
+
+
+# Hashes the content of a .grm file with the token kinds, the terminal ids and
+# the code that compiles it. The parse table and sync sets are indexed by
+# terminal ids, so a compiled grammar is stale once a token type is added or
+# moved, or once the code that builds it changes, even if the .grm file is the
+# same.
+def grammar_digest(content):
+    digest = hashlib.sha256(content)
+    digest.update(repr(token_types).encode('utf-8'))
+    digest.update(repr(sorted(terminal_ids.items())).encode('utf-8'))
+    digest.update(code_digest(grammar_modules).encode('ascii'))
+    return digest.hexdigest()
+
+
+# Statement-level terminals where the recovery from a missing terminal stops,
+# when they can follow it
+recovery_anchors = ('semi', 'rcurbr')
 
 
 def is_semantic_action(input_rule):
@@ -12,12 +58,22 @@ class State(object):
     def __init__(self, name):
         self.name = name
         self.is_terminal = name in terminals
+        self.terminal_id = terminal_ids[name] if self.is_terminal else -1
         self.first_set = set()
         self.follow_set = set()
-        # Flag to compute first and follow sets
-        self.visited = False
+        # The first and follow sets as bytearrays indexed by terminal id
+        self.first_ids = None
+        self.follow_ids = None
+        self.is_nullable = False
+        # The type of the empty AST node made when the state resolves to epsilon
+        self.node_type = node_name_to_type.get(name, NodeType.GENERAL)
         self.rhs = []
         self.rhs_no_action = []
+        # The production to expand for every lookahead terminal id, or None
+        # when the lookahead is not in the first set
+        self.table = None
+        # The terminal ids where panic-mode recovery stops skipping tokens
+        self.sync_ids = None
 
     def nullable(self):
         return '#' in self.first_set
@@ -29,8 +85,45 @@ class State(object):
         return str(self)
 
 
+# A production of the grammar with its semantic actions and symbols split
+# apart. 'steps' keeps the original order of the rule: every step is either
+# (action, None) or (None, index of the symbol in 'symbols'). The actions are
+# decoded by decode_action.
+class Production(object):
+    def __init__(self, lhs, rule):
+        self.lhs = lhs
+        self.rule = rule
+        self.symbols = []
+        self.steps = []
+        for var in rule:
+            if is_semantic_action(var):
+                self.steps.append((decode_action(var, lhs), None))
+            else:
+                self.steps.append((None, len(self.symbols)))
+                self.symbols.append(var)
+        # The State objects of the symbols, set by the grammar
+        self.states = []
+
+    def __str__(self):
+        return '{0} -> {1}'.format(self.lhs, ' '.join(self.rule))
+
+    def __repr__(self):
+        return str(self)
+
+
+# Raised when the rules of a grammar use symbols that are neither terminals
+# nor non-terminals. 'undefined' maps every such symbol to the non-terminals
+# whose rules use it.
+class GrammarError(Exception):
+    def __init__(self, path, undefined):
+        super().__init__('Undefined symbols in {}: {}'.format(path, ', '.join(sorted(undefined))))
+        self.path = path
+        self.undefined = undefined
+
+
 class Grammar(object):
-    def __init__(self):
+    # first_follow_engine is 'bitset', or 'numpy' when NumPy is installed
+    def __init__(self, path=grammar_path, first_follow_engine='bitset'):
         # Maps a state name (str) to a State object
         self.states = {}
         self.start_state = 'START'
@@ -38,207 +131,388 @@ class Grammar(object):
         for terminal in terminals:
             self.states[terminal] = State(terminal)
         # Read all rules and store in states
-        self._read_grammar_file()
-        self._calculate_first_sets()
-        self._calculate_follow_sets()
-
-    def _read_grammar_file(self):
-        script_path = os.path.dirname(os.path.realpath(__file__))
-        grammar_path = os.path.join(script_path, '..', '..', 'data', 'grammar', 'LL1Grammar.grm')
-        with open(grammar_path, 'r') as file:
-            for line in file:
-                # Check if line is empty
-                if '->' not in line:
-                    continue
-                # Split the grammar rule into lhs and rhs
-                rule = line.split('->')
-                lhs = rule[0].strip()
-                rhs = rule[1].split()[:-1]
-                # If rhs is lambda, put '#' instead
-                if len(rhs) == 0:
-                    rhs = '#'
-                # Add rule to the states dict
-                if lhs not in self.states:
-                    self.states[lhs] = State(lhs)
-                self.states[lhs].rhs.append(rhs)
-                if type(rhs) is list:
-                    self.states[lhs].rhs_no_action.append([s for s in rhs if not is_semantic_action(s)])
-
-    def _calculate_first_sets(self):
-        for _, state in self.states.items():
-            state.visited = False
-        for _, state in self.states.items():
-            if not state.visited:
-                self._internal_first_set(state)
+        with open(path, 'rb') as file:
+            content = file.read()
+        self.digest = grammar_digest(content)
+        self._read_grammar_file(content.decode('utf-8'))
+        self._check_symbols(path)
+        self._calculate_first_follow_sets(first_follow_engine)
+        # Maps (non-terminal name, lookahead terminal id) to a Production
+        self.parse_table = {}
+        self._build_parse_table()
+        self._build_sync_sets()
 
-    def _internal_first_set(self, state):
-        state.visited = True
-        # If state X is terminal, First(X) = {X}
-        if state.is_terminal:
-            state.first_set.add(state.name)
-            return
-
-        # If state X has epsilon rhs, '#' ∈ First(X)
-        if '#' in state.rhs:
-            state.first_set.add('#')
-        # Go through all productions of this state
-        for rule in state.rhs_no_action:
-            nullable = True
-            for symbol in rule:
-                symbol_state = self.states[symbol]
-                if not symbol_state.visited:
-                    self._internal_first_set(symbol_state)
-                state.first_set |= symbol_state.first_set - set('#')
-                if '#' not in symbol_state.first_set:
-                    nullable = False
-                    break
-            # If all states in the production are nullable
-            if nullable:
-                state.first_set.add('#')
+    def _read_grammar_file(self, content):
+        for line in content.splitlines():
+            # Check if line is empty
+            if '->' not in line:
+                continue
+            # Split the grammar rule into lhs and rhs
+            rule = line.split('->')
+            lhs = rule[0].strip()
+            rhs = rule[1].split()[:-1]
+            # If rhs is lambda, put '#' instead
+            if len(rhs) == 0:
+                rhs = '#'
+            # Add rule to the states dict
+            if lhs not in self.states:
+                self.states[lhs] = State(lhs)
+            self.states[lhs].rhs.append(rhs)
+            if type(rhs) is list:
+                self.states[lhs].rhs_no_action.append([s for s in rhs if not is_semantic_action(s)])
+
+    def _check_symbols(self, path):
+        undefined = {}
+        for name, state in self.states.items():
+            for rule in state.rhs_no_action:
+                for symbol in rule:
+                    if symbol not in self.states:
+                        users = undefined.setdefault(symbol, [])
+                        if name not in users:
+                            users.append(name)
+        if undefined:
+            raise GrammarError(path, undefined)
 
-    def _calculate_follow_sets(self):
+    # For every lookahead in the first set of a state, picks the first rule
+    # whose leading symbol can start with the lookahead, or can vanish and
+    # be followed by it
+    def _build_parse_table(self):
         for _, state in self.states.items():
-            state.visited = False
+            if state.is_terminal:
+                continue
+            productions = [Production(state.name, rule) for rule in state.rhs if rule != '#']
+            for production in productions:
+                production.states = [self.states[symbol] for symbol in production.symbols]
+            state.table = [None] * terminal_count
+            for terminal_id in range(terminal_count):
+                if not state.first_ids[terminal_id]:
+                    continue
+                for production in productions:
+                    first_state = production.states[0]
+                    if first_state.first_ids[terminal_id] or \
+                            (first_state.is_nullable and first_state.follow_ids[terminal_id]):
+                        state.table[terminal_id] = production
+                        self.parse_table[(state.name, terminal_id)] = production
+                        break
+
+    # A non-terminal resumes on its first set and gives up on its follow set,
+    # like the panic mode of _parse_state. A terminal resumes on itself and
+    # gives up on the anchors that can follow it. Every state gives up at the
+    # end of the input.
+    def _build_sync_sets(self):
+        anchors = terminal_id_set(recovery_anchors)
         for _, state in self.states.items():
-            if not state.visited:
-                self._internal_follow_set(state)
-
-    def _internal_follow_set(self, state):
-        state.visited = True
-        # if state X is the start state, then its follow set is {$}
-        if state.name == self.start_state:
-            state.follow_set.add('$')
-            return
-
-        for occurrence_state_name, rule in self._all_occurrences(state.name):
-            index = rule.index(state.name)
-            nullable = True
-            for i in range(index + 1, len(rule)):
-                state.follow_set |= self.states[rule[i]].first_set - set('#')
-                if '#' not in self.states[rule[i]].first_set:
-                    nullable = False
-                    break
-            if nullable:
-                occurrence_state = self.states[occurrence_state_name]
-                if not occurrence_state.visited:
-                    self._internal_follow_set(occurrence_state)
-                state.follow_set |= occurrence_state.follow_set
-
-    # Returns all the rules that have the given 'name' in their rhs
-    # in the format of (lhs, rule)
-    def _all_occurrences(self, name):
-        occurrences = []
+            if state.is_terminal:
+                state.sync_ids = bytearray(a & b for a, b in zip(anchors, state.follow_ids))
+                state.sync_ids[state.terminal_id] = 1
+            else:
+                state.sync_ids = bytearray(a | b for a, b in zip(state.first_ids, state.follow_ids))
+            state.sync_ids[END_OF_INPUT] = 1
+
+    def _calculate_first_follow_sets(self, engine):
+        rules = []
         for _, state in self.states.items():
             for rule in state.rhs_no_action:
-                if name in rule:
-                    occurrences.append((state.name, rule))
-        return occurrences
+                rules.append((state.name, rule))
+            if '#' in state.rhs:
+                rules.append((state.name, []))
+        first, follow = first_follow_sets(rules, self.start_state, engine)
+
+        for _, state in self.states.items():
+            state.first_ids = bytearray(terminal_count)
+            state.follow_ids = bytearray(terminal_count)
+            for bits, ids, names_set in ((first.get(state.name, 0), state.first_ids, state.first_set),
+                                         (follow.get(state.name, 0), state.follow_ids, state.follow_set)):
+                if bits & EPSILON:
+                    names_set.add('#')
+                    bits ^= EPSILON
+                # Go through the set bits only
+                while bits:
+                    terminal_id = (bits & -bits).bit_length() - 1
+                    bits ^= 1 << terminal_id
+                    ids[terminal_id] = 1
+                    names_set.add(terminal_names[terminal_id])
+            state.is_nullable = state.nullable()
+
+
+# Compiled grammars that were already loaded in this process, by .grm path
+_grammars = {}
+
+
+def _compiled_grammar_path(path):
+    return path + '.compiled'
+
+
+def _load_compiled_grammar(path, digest):
+    try:
+        with open(_compiled_grammar_path(path), 'rb') as file:
+            compiled_digest, grammar = pickle.load(file)
+    except (OSError, EOFError, ValueError, TypeError, AttributeError, ImportError, pickle.UnpicklingError):
+        return None
+    if compiled_digest != digest:
+        return None
+    return grammar
+
+
+def _save_compiled_grammar(path, grammar):
+    compiled_path = _compiled_grammar_path(path)
+    temp_path = '{}.{}.tmp'.format(compiled_path, os.getpid())
+    try:
+        with open(temp_path, 'wb') as file:
+            pickle.dump((grammar.digest, grammar), file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, compiled_path)
+    except OSError:
+        # The grammar directory may be read-only. The grammar is then only
+        # shared within this process.
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+# Returns the grammar of the .grm file, shared by all parsers of the process.
+# The states, first/follow sets and parse table are stored in a compiled file
+# next to the .grm file, which is rebuilt when the content hash of the .grm
+# file, the terminal ids or the code of the grammar modules change.
+def load_grammar(path=grammar_path):
+    grammar = _grammars.get(path)
+    if grammar is not None:
+        return grammar
+
+    with open(path, 'rb') as file:
+        digest = grammar_digest(file.read())
+    grammar = _load_compiled_grammar(path, digest)
+    if grammar is None:
+        grammar = Grammar(path)
+        _save_compiled_grammar(path, grammar)
+    _grammars[path] = grammar
+    return grammar
 
 
 class Parser(object):
-    def __init__(self, lexer):
+    # 'iterative' keeps the productions being parsed on an explicit stack, so
+    # deeply nested inputs do not hit the recursion limit. 'recursive' calls
+    # _parse_state once per grammar symbol. 'generated' runs a parser module
+    # generated from the grammar. All build the same AST and errors, but the
+    # generated parser does not record the parse tree.
+    engines = ('iterative', 'recursive', 'generated')
+
+    # The parse tree and its derivations are only needed to print them. With
+    # build_parse_tree=False, parse_tree is None and only the AST is built. The
+    # generated parser never builds the parse tree, so its parse_tree is None.
+    # 'hooks' is a ParserHooks that is notified of the parse events, which the
+    # generated parser does not report. The AST is built in 'ast', a new AST
+    # by default, or an ASTArena.
+    def __init__(self, lexer, engine='iterative', build_parse_tree=True, hooks=None, ast=None):
+        if engine not in self.engines:
+            raise ValueError('Unknown parser engine: {}'.format(engine))
+        if engine == 'generated' and hooks is not None:
+            raise ValueError('The generated parser does not support hooks')
+        self.engine = engine
         self._lexer = lexer
         self._lookahead = None
         self._lookahead_lextoken = None
         self._prev_lextoken = None
-        self._grammar = Grammar()
+        self._grammar = load_grammar()
         self.errors = []
-        self.ast = AST()
-        self.parse_tree = ParseTree(self._grammar.start_state)
+        # Column shift of syntax errors reported after a token, by token offset
+        self._error_shift = {}
+        self.ast = ast if ast is not None else AST()
+        if engine == 'generated':
+            build_parse_tree = False
+        self.parse_tree = ParseTree(self._grammar.start_state) if build_parse_tree else None
+        self._hooks = hooks
 
     def _next_token(self):
         # Check for a lexer error
         while True:
             self._prev_lextoken = self._lookahead_lextoken
             self._lookahead_lextoken = self._lexer.next_token()
-            if self._lookahead_lextoken and self._lookahead_lextoken.type == 'ERROR':
+            if self._lookahead_lextoken and self._lookahead_lextoken.kind == ERROR_KIND:
                 self.errors.append(self._lookahead_lextoken.lexer_error_message())
             else:
                 break
         # Check for the end of the file
         if self._lookahead_lextoken:
-            self._lookahead = tokens_to_terminals[self._lookahead_lextoken.type]
+            self._lookahead = self._lookahead_lextoken.kind
         else:
-            self._lookahead = '$'
+            self._lookahead = END_OF_INPUT
 
     def parse(self):
+        if self._hooks is not None:
+            self._hooks.on_start()
         self._next_token()
-        self._parse_state(self._grammar.states[self._grammar.start_state], self.parse_tree.root)
+        root = self.parse_tree.root if self.parse_tree is not None else None
+        start_state = self._grammar.states[self._grammar.start_state]
+        if self.engine == 'generated':
+            # The generator imports this module
+            from ogle.parser.parser_generator import generated_parser
+            parsed = generated_parser(self._grammar).parse(self)
+        elif self.engine == 'recursive':
+            parsed = self._parse_state(start_state, root)
+        else:
+            parsed = self._parse_iterative(start_state, root)
+        if not parsed:
+            self._handle_start_error(start_state)
         self.ast.finish_building()
+        if self._hooks is not None:
+            self._hooks.on_finish()
 
     def _parse_state(self, state, parse_node, panic_mode=False):
         # If we reached the end of the file, finish the function
-        if panic_mode and self._lookahead == '$':
+        if panic_mode and self._lookahead == END_OF_INPUT:
             return True
 
         if state.is_terminal:
-            if self._lookahead == state.name:
-                # Create AST node if should be created
-                if self._lookahead in terminal_nodes:
-                    location = (self._lookahead_lextoken.line_number, self._lookahead_lextoken.line_position)
-                    self.ast.make_node(self._lookahead_lextoken.type, self._lookahead_lextoken.value, location)
-                # Fetch the next token
-                self._next_token()
+            if self._lookahead == state.terminal_id:
+                self._match_terminal()
                 return True
             else:
                 return False
 
         # Check if token is not parsable by this state
-        if self._lookahead not in state.first_set:
-            if (panic_mode or state.nullable()) and self._lookahead in state.follow_set:
+        production = state.table[self._lookahead]
+        if production is None:
+            if (panic_mode or state.is_nullable) and state.follow_ids[self._lookahead]:
+                if self._hooks is not None:
+                    self._hooks.on_epsilon(state.name)
                 # Create an empty node in AST
-                self.ast.make_node(state.name)
+                self.ast.make_node(state.name, node_type=state.node_type)
                 # Mark the tree node as deleted
-                parse_node.deleted = True
-                self.parse_tree.add_derivation()
+                if parse_node is not None:
+                    self.parse_tree.delete(parse_node)
                 return True
             else:
                 return False
 
-        # Find the correct production to use for this state
-        production = []
-        for rule in state.rhs:
-            if rule == '#':
-                continue
-            if self._rule_can_produce_lookahead(rule):
-                production = rule
-                break
-
+        if self._hooks is not None:
+            self._hooks.on_expand(state.name, production.symbols)
         # Create parse children nodes for the state
-        for var in production:
-            if '#' in var:
-                continue
-            parse_node.add_child(ParseNode(var))
-        self.parse_tree.add_derivation()
+        if parse_node is not None:
+            self.parse_tree.expand(parse_node, production.symbols)
 
         # Parse the production
-        cnt = 0
-        for var in production:
+        for action, index in production.steps:
             # Found a semantic action
-            if '#' in var:
-                self.ast.perform_operation(var, state.name)
+            if action is not None:
+                self.ast.perform_action(action)
                 continue
 
-            var_state = self._grammar.states[var]
-            result = self._parse_state(var_state, parse_node.children[cnt])
-            if not result:
-                # Handle the parse error
-                self._handle_parse_error(var_state)
-                while not self._parse_state(var_state, parse_node.children[cnt], panic_mode=True):
-                    self._next_token()
-            cnt += 1
+            var_state = production.states[index]
+            child = parse_node.children[index] if parse_node is not None else None
+            result = self._parse_state(var_state, child)
+            if not result and self._recover(var_state):
+                self._parse_state(var_state, child, panic_mode=True)
         return True
 
-    def _rule_can_produce_lookahead(self, rule):
-        first_state_name = None
-        for state_name in rule:
-            first_state_name = state_name
-            # it is not a semantic action
-            if '#' not in first_state_name:
-                break
-        first_state = self._grammar.states[first_state_name]
-        return self._lookahead in first_state.first_set or \
-            (first_state.nullable() and self._lookahead in first_state.follow_set)
+    # Same as _parse_state, but the productions being parsed are kept on an
+    # explicit stack. Every frame is [state, production, parse node, index of
+    # the next step]. Parse nodes are None when the parse tree is not built.
+    # Returns False when the lookahead cannot start the state, like
+    # _parse_state
+    def _parse_iterative(self, state, parse_node):
+        stack = []
+        if not self._enter_state(state, parse_node, False, stack):
+            return False
+        perform_action = self.ast.perform_action
+        while stack:
+            frame = stack[-1]
+            state, production, parse_node, position = frame
+            steps = production.steps
+            # Run the steps of the production until a non-terminal is entered
+            while position < len(steps):
+                action, index = steps[position]
+                position += 1
+                # Found a semantic action
+                if action is not None:
+                    perform_action(action)
+                    continue
+
+                var_state = production.states[index]
+                if var_state.is_terminal and self._lookahead == var_state.terminal_id:
+                    self._match_terminal()
+                    continue
+
+                frame[3] = position
+                depth = len(stack)
+                child = parse_node.children[index] if parse_node is not None else None
+                if not self._enter_state(var_state, child, False, stack) and self._recover(var_state):
+                    self._enter_state(var_state, child, True, stack)
+                if len(stack) != depth:
+                    break
+            else:
+                stack.pop()
+        return True
+
+    # Starts parsing a state. Terminals and epsilon are parsed right away,
+    # while the production of a non-terminal is pushed on the stack. Returns
+    # False when the lookahead cannot start the state, like _parse_state.
+    def _enter_state(self, state, parse_node, panic_mode, stack):
+        # If we reached the end of the file, the state is done
+        if panic_mode and self._lookahead == END_OF_INPUT:
+            return True
+
+        if state.is_terminal:
+            if self._lookahead == state.terminal_id:
+                self._match_terminal()
+                return True
+            return False
+
+        production = state.table[self._lookahead]
+        if production is None:
+            if (panic_mode or state.is_nullable) and state.follow_ids[self._lookahead]:
+                if self._hooks is not None:
+                    self._hooks.on_epsilon(state.name)
+                # Create an empty node in AST
+                self.ast.make_node(state.name, node_type=state.node_type)
+                # Mark the tree node as deleted
+                if parse_node is not None:
+                    self.parse_tree.delete(parse_node)
+                return True
+            return False
+
+        if self._hooks is not None:
+            self._hooks.on_expand(state.name, production.symbols)
+        # Create parse children nodes for the state
+        if parse_node is not None:
+            self.parse_tree.expand(parse_node, production.symbols)
+        stack.append([state, production, parse_node, 0])
+        return True
+
+    def _match_terminal(self):
+        if self._hooks is not None:
+            self._hooks.on_match(self._lookahead_lextoken)
+        # Create AST node if should be created
+        if terminal_node_ids[self._lookahead]:
+            token = self._lookahead_lextoken
+            self.ast.make_node(token.type, token.value, offset=token.offset, source=token.source,
+                               node_type=terminal_node_types[self._lookahead])
+        # Fetch the next token
+        self._next_token()
+
+    # Reports that the input cannot start the program. There is nothing to
+    # recover into, so the rest of the input is not checked and no AST is built.
+    def _handle_start_error(self, start_state):
+        self._handle_parse_error(start_state)
+        if self._hooks is not None:
+            self._hooks.on_error(start_state.name, self.errors[-1])
+
+    # Reports the syntax error, then skips tokens until the lookahead is in the
+    # sync set of the state. Returns True when the state can be parsed in
+    # panic mode, and False when it is given up: at the end of the input, or
+    # at an anchor after a missing terminal.
+    def _recover(self, var_state):
+        self._handle_parse_error(var_state)
+        sync_ids = var_state.sync_ids
+        hooks = self._hooks
+        if hooks is not None:
+            hooks.on_error(var_state.name, self.errors[-1])
+            while not sync_ids[self._lookahead]:
+                hooks.on_skip(self._lookahead_lextoken)
+                self._next_token()
+        while not sync_ids[self._lookahead]:
+            self._next_token()
+        if self._lookahead == END_OF_INPUT:
+            return False
+        return not var_state.is_terminal or self._lookahead == var_state.terminal_id
 
     def _handle_parse_error(self, var_state):
         # Stop building the AST
@@ -246,10 +520,17 @@ class Parser(object):
 
         token = self._prev_lextoken
         if token:
-            token.line_position += len(token.value) + 1
+            # Point right after the last token that was parsed. Errors reported
+            # before any other token is read move further to the right.
+            self._error_shift[token.offset] = self._error_shift.get(token.offset, 0) + len(token.value) + 1
+            line_number, line_position = token.source.position(token.offset)
+            location = '{}:{}'.format(line_number, line_position + self._error_shift[token.offset])
+        elif self._lookahead_lextoken:
+            location = self._lookahead_lextoken.location()
         else:
-            token = self._lookahead_lextoken
-        error_message = 'Syntax error at location {}.'.format(token.location())
+            # The input has no tokens
+            location = '1:1'
+        error_message = 'Syntax error at location {}.'.format(location)
         if '#' not in var_state.first_set:
             first_set = var_state.first_set - set('#')
             if len(first_set) == 1:
@@ -0,0 +1,185 @@
+import argparse
+import types
+from io import StringIO
+from ogle.ast.ast import MAKE_NODE, terminal_node_ids, terminal_node_types
+from ogle.parser.grammar_spec import terminals, terminal_count
+from ogle.parser.parser import load_grammar
+
+# The AST stack operations of the semantic actions #2..#7, by opcode
+ast_operations = {
+    2: '_make_right_child',
+    3: '_make_left_child',
+    4: '_adopt_right_children',
+    5: '_group_together',
+    6: '_delete_top',
+    7: '_replace_node_with_child',
+}
+
+header = '''# Generated by ogle.parser.parser_generator. Do not edit.
+# Grammar digest: {digest}
+from ogle.ast.ast_node import NodeType
+from ogle.parser.grammar_spec import END_OF_INPUT
+
+GRAMMAR_DIGEST = '{digest}'
+
+
+def parse(parser):
+    return parse_{start}(parser)
+
+
+# Reports a missing terminal, then skips tokens to its sync set and matches it
+# when it was found
+def _recover_terminal(parser, name, node_name, node_type):
+    if parser._recover(parser._grammar.states[name]):
+        if node_name is not None:
+            token = parser._lookahead_lextoken
+            parser.ast.make_node(node_name, token.value, offset=token.offset, source=token.source,
+                                 node_type=node_type)
+        parser._next_token()
+
+
+# Reports a missing non-terminal, then skips tokens to its sync set and parses
+# it in panic mode
+def _recover(parser, name, parse_function):
+    if parser._recover(parser._grammar.states[name]):
+        parse_function(parser, True)
+'''
+
+
+# Writes a Python module with one parse function per non-terminal of the
+# grammar. The module behaves like Parser._parse_state: the lookahead
+# switches are unrolled from the parse table and the semantic actions
+# become direct calls on the AST.
+class ParserGenerator(object):
+    def __init__(self, grammar):
+        self.grammar = grammar
+        self.output = None
+        # Names of the module-level terminal sets, by their content
+        self.set_names = {}
+
+    def generate(self, output_file):
+        functions = StringIO()
+        self.output = functions
+        for name, state in self.grammar.states.items():
+            if not state.is_terminal:
+                self._write_function(state)
+
+        output_file.write(header.format(digest=self.grammar.digest, start=self.grammar.start_state))
+        output_file.write('\n\n')
+        for terminal_ids, set_name in self.set_names.items():
+            output_file.write('{} = frozenset({})\n'.format(set_name, sorted(terminal_ids)))
+        output_file.write(functions.getvalue())
+
+    def _write(self, indent, line):
+        self.output.write('    ' * indent + line + '\n')
+
+    def _terminal_set(self, terminal_ids):
+        terminal_ids = frozenset(terminal_ids)
+        if terminal_ids not in self.set_names:
+            self.set_names[terminal_ids] = '_set_{}'.format(len(self.set_names))
+        return self.set_names[terminal_ids]
+
+    # Returns the condition that checks the lookahead against the terminals
+    def _lookahead_test(self, terminal_ids):
+        if len(terminal_ids) == 1:
+            return 'lookahead == {}'.format(terminal_ids[0])
+        return 'lookahead in {}'.format(self._terminal_set(terminal_ids))
+
+    def _write_function(self, state):
+        self.output.write('\n\n')
+        self._write(0, 'def parse_{}(parser, panic_mode=False):'.format(state.name))
+        self._write(1, 'lookahead = parser._lookahead')
+        self._write(1, 'if panic_mode and lookahead == END_OF_INPUT:')
+        self._write(2, 'return True')
+        self._write(1, 'ast = parser.ast')
+
+        # Group the lookaheads of every production
+        productions = []
+        lookaheads = {}
+        for terminal_id in range(terminal_count):
+            production = state.table[terminal_id]
+            if production is None:
+                continue
+            if id(production) not in lookaheads:
+                productions.append(production)
+                lookaheads[id(production)] = []
+            lookaheads[id(production)].append(terminal_id)
+
+        for production in productions:
+            self._write(1, 'if {}:'.format(self._lookahead_test(lookaheads[id(production)])))
+            self._write(2, '# {}'.format(production))
+            for action, index in production.steps:
+                if action is not None:
+                    self._write_action(action)
+                elif production.states[index].is_terminal:
+                    self._write_terminal(production.states[index])
+                else:
+                    self._write_non_terminal(production.states[index])
+            self._write(2, 'return True')
+
+        # The state resolves to epsilon
+        follow = [terminal_id for terminal_id in range(terminal_count) if state.follow_ids[terminal_id]]
+        if follow:
+            condition = self._lookahead_test(follow)
+            if not state.is_nullable:
+                condition = 'panic_mode and ' + condition
+            self._write(1, 'if {}:'.format(condition))
+            self._write(2, 'ast.make_node({!r}, node_type=NodeType.{})'.format(state.name, state.node_type.name))
+            self._write(2, 'return True')
+        self._write(1, 'return False')
+
+    def _write_action(self, action):
+        opcode, node_name, node_type = action
+        if opcode == MAKE_NODE:
+            self._write(2, 'ast.make_node({!r}, node_type=NodeType.{})'.format(node_name, node_type.name))
+        else:
+            self._write(2, 'if not ast.ignore_input:')
+            self._write(3, 'ast.{}()'.format(ast_operations[opcode]))
+
+    def _write_terminal(self, state):
+        terminal_id = state.terminal_id
+        node_name = terminals[state.name] if terminal_node_ids[terminal_id] else None
+        node_type = terminal_node_types[terminal_id]
+        self._write(2, 'if parser._lookahead == {}:'.format(terminal_id))
+        if node_name is not None:
+            self._write(3, 'token = parser._lookahead_lextoken')
+            self._write(3, 'ast.make_node({!r}, token.value, offset=token.offset, source=token.source, '
+                           'node_type=NodeType.{})'.format(node_name, node_type.name))
+        self._write(3, 'parser._next_token()')
+        self._write(2, 'else:')
+        self._write(3, '_recover_terminal(parser, {!r}, {!r}, NodeType.{})'.format(
+            state.name, node_name, node_type.name))
+
+    def _write_non_terminal(self, state):
+        self._write(2, 'if not parse_{}(parser):'.format(state.name))
+        self._write(3, '_recover(parser, {0!r}, parse_{0})'.format(state.name))
+
+
+# Generated modules compiled in this process, by grammar digest
+_generated_parsers = {}
+
+
+# Generates the parser module of the grammar and compiles it in memory. The
+# module is shared by all parsers of the same grammar.
+def generated_parser(grammar):
+    module = _generated_parsers.get(grammar.digest)
+    if module is None:
+        source = StringIO()
+        ParserGenerator(grammar).generate(source)
+        module = types.ModuleType('ogle.parser.generated_parser')
+        exec(compile(source.getvalue(), '<generated parser>', 'exec'), module.__dict__)
+        _generated_parsers[grammar.digest] = module
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generates a Python parser module from the LL(1) grammar')
+    parser.add_argument('output_file', type=str)
+    output_file_name = parser.parse_args().output_file
+
+    with open(output_file_name, 'w') as output:
+        ParserGenerator(load_grammar()).generate(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import time
+from collections import Counter
+
+
+# The events of a parse. Parser calls these methods when it is given hooks;
+# override the ones you need.
+class ParserHooks(object):
+    def on_start(self):
+        pass
+
+    def on_finish(self):
+        pass
+
+    # A non-terminal is replaced by the symbols of one of its rules
+    def on_expand(self, name, symbols):
+        pass
+
+    # A non-terminal resolves to epsilon because the lookahead follows it
+    def on_epsilon(self, name):
+        pass
+
+    # A terminal matches the lookahead token
+    def on_match(self, token):
+        pass
+
+    # A syntax error is reported while parsing the state of the given name
+    def on_error(self, name, message):
+        pass
+
+    # The token is skipped to recover from the last syntax error
+    def on_skip(self, token):
+        pass
+
+
+# Counts the parse events to tell whether a slow parse comes from the shape
+# of the grammar or from error recovery
+class ParseStats(ParserHooks):
+    def __init__(self):
+        self.expansions = Counter()
+        self.epsilons = Counter()
+        self.tokens_matched = 0
+        self.panic_invocations = 0
+        self.tokens_skipped = 0
+        self.elapsed = 0.0
+        self._start = None
+
+    def on_start(self):
+        self._start = time.perf_counter()
+
+    def on_finish(self):
+        self.elapsed += time.perf_counter() - self._start
+
+    def on_expand(self, name, symbols):
+        self.expansions[name] += 1
+
+    def on_epsilon(self, name):
+        self.epsilons[name] += 1
+
+    def on_match(self, token):
+        self.tokens_matched += 1
+
+    def on_error(self, name, message):
+        self.panic_invocations += 1
+
+    def on_skip(self, token):
+        self.tokens_skipped += 1
+
+    @property
+    def tokens_consumed(self):
+        return self.tokens_matched + self.tokens_skipped
+
+    @property
+    def tokens_per_second(self):
+        return self.tokens_consumed / self.elapsed if self.elapsed else 0.0
+
+    def report(self):
+        to_ret = f'Tokens consumed: {self.tokens_consumed} ({self.tokens_matched} matched, ' \
+                 f'{self.tokens_skipped} skipped during recovery)\n'
+        to_ret += f'Panic-mode invocations: {self.panic_invocations}\n'
+        to_ret += f'Parse time: {self.elapsed:.3f}s, {self.tokens_per_second:.0f} tokens/s\n'
+        to_ret += f'Expansions: {sum(self.expansions.values())}\n'
+        for name, count in self.expansions.most_common():
+            to_ret += f'\t{name}: {count}\n'
+        to_ret += f'Epsilon resolutions: {sum(self.epsilons.values())}\n'
+        for name, count in self.epsilons.most_common():
+            to_ret += f'\t{name}: {count}\n'
+        return to_ret
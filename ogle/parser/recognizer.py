@@ -0,0 +1,54 @@
+from ogle.parser.grammar_spec import END_OF_INPUT
+from ogle.parser.parser import Parser
+
+
+# An LL(1) recognizer that only checks the syntax of the input. It skips the
+# semantic actions and keeps the grammar symbols left to match on a stack, so
+# no AST node or parse tree is built. The errors are the same as the errors of
+# Parser, including the lexer errors.
+class Recognizer(Parser):
+    def __init__(self, lexer):
+        super().__init__(lexer, build_parse_tree=False)
+
+    def parse(self):
+        self._next_token()
+        stack = []
+        start_state = self._grammar.states[self._grammar.start_state]
+        # Like the parser, the input is not checked when the start state fails
+        if not self._expand(start_state, False, stack):
+            self._handle_start_error(start_state)
+            return
+        while stack:
+            state = stack.pop()
+            if state.is_terminal:
+                if self._lookahead == state.terminal_id:
+                    self._next_token()
+                    continue
+            elif self._expand(state, False, stack):
+                continue
+
+            if self._recover(state):
+                if state.is_terminal:
+                    self._next_token()
+                else:
+                    self._expand(state, True, stack)
+
+    # Pushes the symbols of the production of a non-terminal on the stack.
+    # Returns False when the lookahead cannot start the state, like
+    # Parser._enter_state.
+    def _expand(self, state, panic_mode, stack):
+        if panic_mode and self._lookahead == END_OF_INPUT:
+            return True
+
+        production = state.table[self._lookahead]
+        if production is None:
+            return (panic_mode or state.is_nullable) and bool(state.follow_ids[self._lookahead])
+        stack.extend(reversed(production.states))
+        return True
+
+
+# Returns the syntax errors of the input of the lexer, without building the AST
+def check_syntax(lexer):
+    recognizer = Recognizer(lexer)
+    recognizer.parse()
+    return recognizer.errors
@@ -1,43 +1,70 @@
 import argparse
+import sys
 from ogle.code_generator.code_generator import CodeGenerator
 from ogle.lexer.lexer import Lexer
+from ogle.parser.ast_cache import DEFAULT_MAX_SIZE, ASTCache
 from ogle.parser.parser import Parser
+from ogle.parser.recognizer import check_syntax
 from ogle.semantic_analyzer.semantic_analyzer import SemanticAnalyzer
 
 
 def main():
     parser = argparse.ArgumentParser(description='Gets file name and compiles it')
     parser.add_argument('file_name', type=str)
-    file_name = parser.parse_args().file_name
+    parser.add_argument('--parser-engine', choices=Parser.engines, default='iterative')
+    parser.add_argument('--syntax-only', action='store_true',
+                        help='only check the syntax, and exit with status 1 on errors')
+    parser.add_argument('--ast-cache', type=str, metavar='DIRECTORY',
+                        help='reuse the ASTs of unchanged sources from this directory')
+    parser.add_argument('--ast-cache-size', type=int, default=DEFAULT_MAX_SIZE // 2 ** 20, metavar='MIB')
+    args = parser.parse_args()
+    file_name = args.file_name
     file_name_no_type = file_name.split('.')[0]
 
-    # open the file and read
-    with open(file_name, 'r') as input_file:
-        input_text = input_file.read()
-        lexer = Lexer(input_text)
-        parser = Parser(lexer)
-        parser.parse()
-        if parser.errors:
-            for error in parser.errors:
+    if args.ast_cache and not args.syntax_only:
+        cache = ASTCache(args.ast_cache, args.ast_cache_size * 2 ** 20, args.parser_engine)
+        ast, errors = cache.parse_file(file_name)
+        compile_ast(ast, errors, file_name_no_type)
+        return
+
+    # map the file and lex it in place
+    with Lexer.from_file(file_name) as lexer:
+        if args.syntax_only:
+            errors = check_syntax(lexer)
+            for error in errors:
                 print(error)
+            if errors:
+                sys.exit(1)
+            return
+
+        parser = Parser(lexer, engine=args.parser_engine, build_parse_tree=False)
+        parser.parse()
+        compile_ast(parser.ast, parser.errors, file_name_no_type)
+
+
+# Runs the semantic analysis and the code generation on the AST of a parse
+def compile_ast(ast, errors, file_name_no_type):
+    if errors:
+        for error in errors:
+            print(error)
+        return
+
+    semantic_analyzer = SemanticAnalyzer(ast)
+    semantic_analyzer.analyze()
+    if semantic_analyzer.errors:
+        only_warnings = True
+        for error in semantic_analyzer.errors:
+            location = error[0]
+            error_message = error[1]
+            if 'Error' in error_message:
+                only_warnings = False
+            print(f'Line {location[0]}:{location[1]}, {error_message}')
+        if not only_warnings:
             return
 
-        semantic_analyzer = SemanticAnalyzer(parser.ast)
-        semantic_analyzer.analyze()
-        if semantic_analyzer.errors:
-            only_warnings = True
-            for error in semantic_analyzer.errors:
-                location = error[0]
-                error_message = error[1]
-                if 'Error' in error_message:
-                    only_warnings = False
-                print(f'Line {location[0]}:{location[1]}, {error_message}')
-            if not only_warnings:
-                return
-
-        with open(file_name_no_type + '.m', 'w') as output:
-            code_generator = CodeGenerator(parser.ast, semantic_analyzer.symbol_table)
-            code_generator.generate(output)
+    with open(file_name_no_type + '.m', 'w') as output:
+        code_generator = CodeGenerator(ast, semantic_analyzer.symbol_table)
+        code_generator.generate(output)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,55 @@
+import pytest
+from ogle.lexer.incremental import relex, TextEdit
+from ogle.lexer.lexer import Lexer
+
+input_text = '''class A {
+    public f(integer x) : float;
+};
+/* block
+   comment */
+main
+    local
+        integer x; // trailing comment
+    do
+        x = 1.5e3 + y; x = 2;
+    end
+'''
+
+
+def _token_tuples(tokens):
+    return [(t.type, t.value, t.line_number, t.line_position, t.offset) for t in tokens]
+
+
+# Each tuple is (text to replace, replacement)
+edits = [
+    ('integer x;', 'float x;'),
+    ('1.5e3', '1.5e'),
+    ('x = 1', 'xyz = 1'),
+    ('main', 'main\n\n'),
+    ('/* block', '/* block */ x /*'),
+    ('comment */', 'comment'),
+    ('    public', '/*  public'),
+    ('// trailing', '/* trailing */'),
+    ('};', '}; /* unclosed'),
+    ('\n', ''),
+]
+
+
+# Each tuple is (old text, text to replace, replacement)
+@pytest.mark.parametrize("text, old, new", [(input_text, old, new) for old, new in edits] + [
+    # Closing a comment that was opened by the last tokens before the edit
+    ('x /*ab;', ';', '*/;'),
+])
+def test_relex_matches_full_lex(text, old, new):
+    start = text.index(old)
+    new_text = text[:start] + new + text[start + len(old):]
+    tokens = relex(Lexer(text).all_tokens(), TextEdit(start, start + len(old), new), new_text)
+    assert _token_tuples(tokens) == _token_tuples(Lexer(new_text).all_tokens())
+
+
+def test_relex_reuses_tokens_after_edit():
+    start = input_text.index('integer x;')
+    new_text = input_text[:start] + 'float' + input_text[start + len('integer'):]
+    old_tokens = Lexer(input_text).all_tokens()
+    tokens = relex(list(old_tokens), TextEdit(start, start + len('integer'), 'float'), new_text)
+    assert tokens[-1] is old_tokens[-1]
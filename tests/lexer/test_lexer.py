@@ -21,7 +21,75 @@ def test_lexer(file_name):
 
         # Get all tokens from lexer and translate to a list of dicts
         token_list = lexer.all_tokens()
-        output = [t.__dict__ for t in token_list]
+        output = [{'type': t.type, 'value': t.value, 'line_number': t.line_number, 'line_position': t.line_position}
+                  for t in token_list]
 
         intended_output = json.load(output_file)
         assert output == intended_output
+
+
+def _source_files():
+    data_path = pathlib.Path(__file__).parent.parent.parent.joinpath('data')
+    return sorted(data_path.joinpath('src').glob('*.src')) + sorted(data_path.joinpath('lexer').glob('*.src'))
+
+
+@pytest.mark.parametrize("engine", [e for e in Lexer.engines if e != 'loop'])
+@pytest.mark.parametrize("source_path", _source_files(), ids=lambda p: p.name)
+def test_engine_matches_loop(engine, source_path):
+    input_text = source_path.read_text()
+    expected = [str(t) for t in Lexer(input_text, engine='loop').all_tokens()]
+    output = [str(t) for t in Lexer(input_text, engine=engine).all_tokens()]
+    assert output == expected
+
+
+@pytest.mark.parametrize("engine", [e for e in Lexer.engines if e != 'loop'])
+@pytest.mark.parametrize("input_text", [
+    '1.2.3 .5 1. 1e 1e+ 1e+5 12.5E-3 007',
+    'ifx if then_ x_1 _abc 1abc @b #',
+    'a<=b<>c<d>e==f=g::h:i',
+    '/* unterminated\n comment',
+    'x = /* inline */ 5; // tail\n\t  // next\n\ty',
+    'a = 1;\r\n// c\r\n// d\r\nb\f\vc',
+])
+def test_engine_matches_loop_on_edge_cases(engine, input_text):
+    expected = [str(t) for t in Lexer(input_text, engine='loop').all_tokens()]
+    output = [str(t) for t in Lexer(input_text, engine=engine).all_tokens()]
+    assert output == expected
+
+
+@pytest.mark.parametrize("engine", [e for e in Lexer.engines if e in ('regex', 'numpy')])
+@pytest.mark.parametrize("source_path", _source_files(), ids=lambda p: p.name)
+def test_mapped_file_matches_text(engine, source_path):
+    expected = [str(t) for t in Lexer(source_path.read_text()).all_tokens()]
+    with Lexer.from_file(str(source_path), engine=engine) as lexer:
+        output = [str(t) for t in lexer.all_tokens()]
+    assert output == expected
+
+
+@pytest.mark.parametrize("engine", [e for e in Lexer.engines if e in ('regex', 'numpy')])
+@pytest.mark.parametrize("source_path", _source_files(), ids=lambda p: p.name)
+def test_mapped_file_with_crlf_line_ends(tmp_path, engine, source_path):
+    input_text = source_path.read_text()
+    crlf_path = tmp_path.joinpath(source_path.name)
+    crlf_path.write_bytes(input_text.replace('\n', '\r\n').encode('utf-8'))
+    expected = [str(t) for t in Lexer(input_text).all_tokens()]
+    with Lexer.from_file(str(crlf_path), engine=engine) as lexer:
+        output = [str(t) for t in lexer.all_tokens()]
+    assert output == expected
+
+
+def test_mapped_file_tokens_outlive_the_lexer(tmp_path):
+    path = tmp_path.joinpath('program.src')
+    path.write_text('main do\n  x = 12;\nend')
+    with Lexer.from_file(str(path)) as lexer:
+        tokens = lexer.all_tokens()
+    assert [(t.value, t.line_number, t.line_position) for t in tokens] == \
+        [('main', 1, 1), ('do', 1, 6), ('x', 2, 3), ('=', 2, 5), ('12', 2, 7), (';', 2, 9), ('end', 3, 1)]
+
+
+@pytest.mark.parametrize("engine", Lexer.engines)
+def test_positions_from_offsets(engine):
+    # Tabs count as 4 and comments restart the line position
+    lexer = Lexer('a\tb /* c */ d\n\n  e // f\n  //g\n   h', engine=engine)
+    positions = [(t.value, t.line_number, t.line_position) for t in lexer.all_tokens()]
+    assert positions == [('a', 1, 1), ('b', 1, 6), ('d', 1, 2), ('e', 3, 3), ('h', 5, 4)]
@@ -0,0 +1,28 @@
+import pathlib
+import pytest
+from ogle.lexer.lexer import Lexer
+from ogle.lexer.parallel import chunk_starts, lex_parallel
+
+data_path = pathlib.Path(__file__).parent.parent.parent.joinpath('data', 'src')
+input_text = '\n'.join(p.read_text() for p in sorted(data_path.glob('*.src'))) * 4
+
+
+def test_chunks_start_at_units():
+    starts = chunk_starts(input_text, 4, min_chunk_size=1)
+    assert len(starts) == 4
+    for start in starts[1:]:
+        assert input_text[start - 1] == '\n'
+
+
+@pytest.mark.parametrize("text", [
+    input_text,
+    # A unit start inside a comment is not a boundary
+    input_text.replace('main\n', '/*\nmain\n*/ main\n'),
+    # Unterminated comment and lexical errors are lexed serially
+    input_text + '\n/* unterminated',
+    input_text.replace('main\n', 'main @\n'),
+])
+def test_parallel_matches_serial(text):
+    expected = [str(t) for t in Lexer(text).all_tokens()]
+    stream = lex_parallel(text, workers=3, min_chunk_size=1)
+    assert [str(t) for t in stream] == expected
@@ -0,0 +1,39 @@
+import pathlib
+import pytest
+from ogle.lexer.lexer import Lexer
+from ogle.lexer.token_stream import TokenStream
+from ogle.parser.parser import Parser
+
+source_path = pathlib.Path(__file__).parent.parent.parent.joinpath('data', 'src', 'polynomial.src')
+
+
+def test_stream_matches_all_tokens():
+    input_text = source_path.read_text() + '\n @error'
+    expected = [str(t) for t in Lexer(input_text).all_tokens()]
+    stream = TokenStream.from_lexer(Lexer(input_text))
+    assert len(stream) == len(expected)
+    assert [str(t) for t in stream] == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000000])
+def test_next_tokens(chunk_size):
+    input_text = source_path.read_text()
+    expected = [str(t) for t in Lexer(input_text).all_tokens()]
+    stream = TokenStream.from_lexer(Lexer(input_text))
+    output = []
+    chunk = stream.next_tokens(chunk_size)
+    while chunk:
+        output.extend(str(t) for t in chunk)
+        chunk = stream.next_tokens(chunk_size)
+    assert output == expected
+    assert stream.next_token() is None
+
+
+def test_parser_consumes_stream():
+    input_text = source_path.read_text()
+    parser = Parser(TokenStream.from_lexer(Lexer(input_text)))
+    parser.parse()
+    expected = Parser(Lexer(input_text))
+    expected.parse()
+    assert not parser.errors
+    assert parser.parse_tree.derivation_list == expected.parse_tree.derivation_list
@@ -0,0 +1,24 @@
+from ogle.lexer.lexer import Lexer
+from ogle.parser.parser import Parser
+
+
+# Returns the name, value, type, location and children of the tree under
+# node as nested tuples and lists, to compare trees
+def dump(node):
+    return (node.name, node.value, node.node_type, node.location, [dump(child) for child in node.children])
+
+
+# Yields the nodes of the tree under root
+def nodes(root):
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        yield node
+        pending.extend(node.children)
+
+
+# Parses the text and returns the parser, without the parse tree by default
+def parse(text, engine='iterative', build_parse_tree=False, hooks=None, ast=None):
+    parser = Parser(Lexer(text), engine=engine, build_parse_tree=build_parse_tree, hooks=hooks, ast=ast)
+    parser.parse()
+    return parser
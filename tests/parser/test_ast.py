@@ -0,0 +1,68 @@
+import pytest
+from ogle.ast.ast_node import Node, NodeType
+from ogle.lexer.lexer import Lexer
+from ogle.parser.parser import Parser
+from tests.parser.parse_helpers import nodes, parse
+
+source = '''
+main
+    local
+        integer x;
+    do
+        x = 1 + 2 * 3;
+        write(x);
+    end
+'''
+
+
+def test_children_are_frozen():
+    parser = parse(source)
+    assert all(type(node.children) is tuple for node in nodes(parser.ast.root))
+    with pytest.raises(AttributeError):
+        parser.ast.root.make_right_child(Node('x'))
+
+
+def test_nodes_have_no_dict():
+    node = Node('PROGRAM')
+    assert node.node_type == NodeType.PROGRAM
+    with pytest.raises(AttributeError):
+        node.extra = 1
+
+
+def test_unique_ids_are_lazy():
+    nodes = [Node('a'), Node('b'), Node('c')]
+    assert all(node._unique_id is None for node in nodes)
+    ids = [node.unique_id for node in reversed(nodes)]
+    assert len(set(ids)) == 3
+    assert ids == sorted(ids)
+    assert nodes[0].unique_id == ids[-1]
+
+
+def test_freeze_skips_frozen_subtrees():
+    child = Node('child')
+    child.make_right_child(Node('leaf'))
+    child.freeze()
+    parent = Node('parent')
+    parent.make_right_child(child)
+    parent.make_left_child(Node('first'))
+    parent.freeze()
+    assert [node.name for node in parent.children] == ['first', 'child']
+    assert parent.children[1] is child
+
+
+def _parse_file(path):
+    with Lexer.from_file(str(path)) as lexer:
+        parser = Parser(lexer, build_parse_tree=False)
+        parser.parse()
+    return parser
+
+
+def test_locations_outlive_a_mapped_lexer(tmp_path):
+    path = tmp_path.joinpath('program.src')
+    path.write_bytes(b'main do\r\n  x = 1;\r\nend\r\n')
+    parser = _parse_file(path)
+    locations = {node.value: node.location for node in nodes(parser.ast.root)}
+    assert (locations['x'], locations['1']) == ((2, 3), (2, 7))
+
+    path.write_bytes(b'main do\r\n  x = ;\r\nend\r\n')
+    assert _parse_file(path).errors == ['Syntax error at location 2:7. Expected EXPRESSION.']
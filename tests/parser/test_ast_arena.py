@@ -0,0 +1,56 @@
+import pytest
+from ogle.ast.ast_arena import ASTArena, NO_NODE
+from ogle.ast.ast_node import Node, NodeType
+from ogle.parser.parser import Parser
+from tests.parser.parse_helpers import dump, parse
+from tests.parser.test_correct_parse import input_codes as correct_codes
+from tests.parser.test_parser_engines import inputs
+
+
+@pytest.mark.parametrize("engine", Parser.engines)
+@pytest.mark.parametrize("input_file", inputs)
+def test_arena_matches_nodes(engine, input_file):
+    parser = parse(input_file, engine)
+    arena_parser = parse(input_file, engine, ast=ASTArena())
+    assert arena_parser.errors == parser.errors
+    assert dump(arena_parser.ast.to_node()) == dump(parser.ast.root)
+
+
+@pytest.mark.parametrize("input_file", correct_codes)
+def test_conversion_from_nodes(input_file):
+    root = parse(input_file, 'iterative').ast.root
+    arena = ASTArena.from_node(root)
+    assert dump(arena.to_node()) == dump(root)
+    assert list(arena.preorder()) == list(range(len(arena)))
+
+
+@pytest.mark.parametrize("input_file", correct_codes)
+def test_compacted_arena(input_file):
+    arena = parse(input_file, 'iterative', ast=ASTArena()).ast
+    compacted = arena.compacted()
+    assert dump(compacted.to_node()) == dump(arena.to_node())
+    assert list(compacted.preorder()) == list(range(len(compacted)))
+    for index in range(len(compacted)):
+        for child in compacted.children(index):
+            assert compacted.parent[child] == index
+    assert compacted.parent[compacted.root] == NO_NODE
+
+
+def test_node_accessors():
+    arena = parse('main do x = 1; end', 'iterative', ast=ASTArena()).ast
+    root = arena.root
+    assert arena.name(root) == 'PROGRAM'
+    assert arena.node_type(root) == NodeType.PROGRAM
+    assert arena.location(root) is None
+    values = [arena.value(index) for index in arena.preorder()]
+    assert 'x' in values and '1' in values
+    one = next(index for index in arena.preorder() if arena.value(index) == '1')
+    assert arena.location(one) == (1, 13)
+
+
+def test_conversion_keeps_explicit_locations():
+    root = Node('PROGRAM')
+    root.make_right_child(Node('id', 'x', location=(3, 4)))
+    arena = ASTArena.from_node(root)
+    assert arena.location(1) == (3, 4)
+    assert arena.to_node().children[0].location == (3, 4)
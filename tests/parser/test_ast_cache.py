@@ -0,0 +1,133 @@
+import os
+import pytest
+from ogle.parser import ast_cache
+from ogle.parser.ast_cache import ASTCache, decode_ast, encode_ast
+from tests.parser.parse_helpers import dump, nodes, parse
+from tests.parser.test_error_recovery import missing_rpar
+from tests.parser.test_parser_engines import inputs
+
+source = '''
+class A {
+    public integer x;
+};
+
+main
+    local
+        A a;
+    do
+        a.x = 1 + 2;
+        write(a.x);
+    end
+'''
+
+
+@pytest.mark.parametrize("input_file", inputs)
+def test_encoding_round_trip(input_file):
+    parser = parse(input_file)
+    ast, errors = decode_ast(encode_ast(parser.ast.root, parser.errors))
+    assert errors == parser.errors
+    assert dump(ast.root) == dump(parser.ast.root)
+    assert all(type(node.children) is tuple for node in nodes(ast.root))
+
+
+@pytest.mark.parametrize("data", [b'', b'OGLEAST', b'not an ast at all, just some bytes'])
+def test_decode_rejects_other_data(data):
+    with pytest.raises(ValueError):
+        decode_ast(data)
+
+
+@pytest.mark.parametrize("text", [source, missing_rpar])
+def test_cache_hit(tmp_path, text):
+    cache = ASTCache(str(tmp_path))
+    first_ast, first_errors = cache.parse(text)
+    ast, errors = cache.parse(text)
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert errors == first_errors == parse(text).errors
+    assert dump(ast.root) == dump(first_ast.root)
+
+
+@pytest.mark.parametrize("text", ['', '}}} garbage'])
+def test_cache_hit_without_root(tmp_path, text):
+    cache = ASTCache(str(tmp_path))
+    cache.parse(text)
+    ast, errors = cache.parse(text)
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert errors == parse(text).errors != []
+    assert ast.root is None
+
+
+def test_cache_file(tmp_path):
+    path = tmp_path.joinpath('program.src')
+    path.write_text(source)
+    cache = ASTCache(str(tmp_path.joinpath('cache')))
+    cache.parse_file(str(path))
+    ast, errors = ASTCache(str(tmp_path.joinpath('cache'))).parse_file(str(path))
+    assert not errors
+    assert dump(ast.root) == dump(parse(source).ast.root)
+
+
+def test_cache_file_with_crlf_line_ends(tmp_path):
+    path = tmp_path.joinpath('program.src')
+    path.write_bytes(source.replace('\n', '\r\n').encode('utf-8'))
+    cache = ASTCache(str(tmp_path.joinpath('cache')))
+    cache.parse_file(str(path))
+    ast, errors = cache.parse_file(str(path))
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert not errors
+    assert dump(ast.root) == dump(parse(source).ast.root)
+
+
+def test_changed_parsing_code_misses(tmp_path, monkeypatch):
+    cache = ASTCache(str(tmp_path))
+    cache.parse(source)
+    monkeypatch.setattr(ast_cache, '_code_digest', ast_cache.code_digest()[::-1])
+    cache.parse(source)
+    assert (cache.misses, cache.hits) == (2, 0)
+    assert len(os.listdir(str(tmp_path))) == 2
+
+
+def test_code_digest_covers_every_module_of_the_packages(tmp_path, monkeypatch):
+    package = tmp_path / 'parsing_package'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(ast_cache, '_parsing_packages', ('parsing_package',))
+    monkeypatch.setattr(ast_cache, '_code_digest', None)
+    digest = ast_cache.code_digest()
+    (package / 'helper.py').write_text('x = 1\n')
+    monkeypatch.setattr(ast_cache, '_code_digest', None)
+    assert ast_cache.code_digest() != digest
+
+
+def test_changed_source_misses(tmp_path):
+    cache = ASTCache(str(tmp_path))
+    cache.parse(source)
+    ast, _ = cache.parse(source.replace('1 + 2', '1 + 3'))
+    assert (cache.misses, cache.hits) == (2, 0)
+    assert dump(ast.root) == dump(parse(source.replace('1 + 2', '1 + 3')).ast.root)
+
+
+def test_corrupted_entry_is_parsed_again(tmp_path):
+    cache = ASTCache(str(tmp_path))
+    cache.parse(source)
+    for name in os.listdir(str(tmp_path)):
+        tmp_path.joinpath(name).write_bytes(b'garbage')
+    ast, _ = cache.parse(source)
+    assert cache.misses == 2
+    assert dump(ast.root) == dump(parse(source).ast.root)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    texts = [source.replace('1 + 2', '1 + {}'.format(i)) for i in range(3)]
+    cache = ASTCache(str(tmp_path))
+    for text in texts:
+        cache.parse(text)
+    sizes = sorted(os.path.getsize(str(tmp_path.joinpath(name))) for name in os.listdir(str(tmp_path)))
+    # Make the first entry the most recently used, then leave room for two
+    for i, text in enumerate(texts):
+        os.utime(str(tmp_path.joinpath(cache.key(text.encode()) + '.ast')), ns=(i, i))
+    cache.parse(texts[0])
+    cache.max_size = sum(sizes[-2:])
+    cache.evict()
+    remaining = set(os.listdir(str(tmp_path)))
+    assert remaining == {cache.key(texts[i].encode()) + '.ast' for i in (0, 2)}
@@ -0,0 +1,73 @@
+import os
+import shutil
+from ogle.parser import parser
+from ogle.parser.parser import Grammar, grammar_path, load_grammar
+
+
+def _copy_grammar(tmp_path):
+    path = str(tmp_path / 'LL1Grammar.grm')
+    shutil.copyfile(grammar_path, path)
+    return path
+
+
+def test_grammar_is_shared():
+    assert load_grammar() is load_grammar()
+
+
+def test_compiled_grammar_is_reused(tmp_path):
+    path = _copy_grammar(tmp_path)
+    grammar = load_grammar(path)
+    assert os.path.exists(path + '.compiled')
+
+    # A new process would load the compiled file
+    del parser._grammars[path]
+    loaded = load_grammar(path)
+    assert loaded is not grammar
+    assert loaded.digest == grammar.digest
+    assert set(loaded.parse_table) == set(grammar.parse_table)
+    for name, state in grammar.states.items():
+        assert loaded.states[name].first_set == state.first_set
+        assert loaded.states[name].follow_set == state.follow_set
+
+
+def test_compiled_grammar_is_invalidated(tmp_path):
+    path = _copy_grammar(tmp_path)
+    grammar = load_grammar(path)
+    with open(path, 'a') as file:
+        file.write('\nEXTRA_STATE -> id .\n')
+
+    del parser._grammars[path]
+    changed = load_grammar(path)
+    assert changed.digest != grammar.digest
+    assert 'EXTRA_STATE' in changed.states
+    assert 'EXTRA_STATE' not in grammar.states
+    assert changed.digest == Grammar(path).digest
+
+
+def test_compiled_grammar_is_invalidated_by_terminal_ids(tmp_path, monkeypatch):
+    path = _copy_grammar(tmp_path)
+    grammar = load_grammar(path)
+
+    # The same .grm file with the token kinds of two terminals swapped
+    terminal_ids = dict(parser.terminal_ids)
+    terminal_ids['lpar'], terminal_ids['rpar'] = terminal_ids['rpar'], terminal_ids['lpar']
+    monkeypatch.setattr(parser, 'terminal_ids', terminal_ids)
+    del parser._grammars[path]
+    changed = load_grammar(path)
+    assert changed is not grammar
+    assert changed.digest != grammar.digest
+    assert changed.digest == Grammar(path).digest
+
+
+def test_compiled_grammar_is_invalidated_by_grammar_code(tmp_path, monkeypatch):
+    path = _copy_grammar(tmp_path)
+    grammar = load_grammar(path)
+
+    # The same .grm file after an edit to the code that compiles it
+    edited = parser.code_digest(parser.grammar_modules)[::-1]
+    monkeypatch.setitem(parser._code_digests, parser.grammar_modules, edited)
+    del parser._grammars[path]
+    changed = load_grammar(path)
+    assert changed is not grammar
+    assert changed.digest != grammar.digest
+    assert changed.digest == Grammar(path).digest
@@ -0,0 +1,49 @@
+import pytest
+from ogle.lexer.lexer import Lexer
+from ogle.parser.grammar_spec import END_OF_INPUT, terminal_names
+from ogle.parser.parser import Parser, load_grammar
+
+missing_rpar = '''
+main
+    local
+        integer x;
+    do
+        x = (1 + 2;
+        x = 3;
+        y = 4 4;
+    end
+'''
+
+
+def _sync_names(state_name):
+    state = load_grammar().states[state_name]
+    return {terminal_names[terminal_id] for terminal_id, is_set in enumerate(state.sync_ids) if is_set}
+
+
+@pytest.mark.parametrize("state_name, names", [
+    ('rpar', {'rpar', 'semi', '$'}),
+    ('semi', {'semi', 'rcurbr', '$'}),
+    ('STATEMENT', {'id', 'if', 'while', 'read', 'write', 'return', 'semi', 'else', 'end', '$'}),
+])
+def test_sync_set(state_name, names):
+    assert _sync_names(state_name) == names
+
+
+def test_sync_sets_cover_first_and_follow_sets():
+    for _, state in load_grammar().states.items():
+        assert state.sync_ids[END_OF_INPUT]
+        if not state.is_terminal:
+            assert all(state.sync_ids[terminal_id] for terminal_id, is_set in enumerate(state.first_ids) if is_set)
+            assert all(state.sync_ids[terminal_id] for terminal_id, is_set in enumerate(state.follow_ids) if is_set)
+
+
+# A missing ')' stops the recovery at the end of the statement instead of
+# skipping the rest of the file, so the next error is still reported
+@pytest.mark.parametrize("engine", Parser.engines)
+def test_missing_terminal_recovers_at_anchor(engine):
+    parser = Parser(Lexer(missing_rpar), engine=engine)
+    parser.parse()
+    assert parser.errors == [
+        'Syntax error at location 6:20. Expected the token: rpar',
+        'Syntax error at location 8:15.',
+    ]
@@ -0,0 +1,60 @@
+import json
+import os
+import pytest
+from ogle.parser.first_follow import EPSILON, first_follow_sets
+from ogle.parser.grammar_spec import END_OF_INPUT, terminal_ids
+from ogle.parser.parser import Grammar
+
+data_directory = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')
+
+
+def _bits(*names):
+    to_ret = 0
+    for name in names:
+        to_ret |= EPSILON if name == '#' else 1 << terminal_ids[name]
+    return to_ret
+
+
+def test_sets_match_recursive_computation():
+    # The first and follow sets computed by the previous recursive algorithm
+    with open(os.path.join(data_directory, 'LL1Grammar_sets.json')) as file:
+        expected = json.load(file)
+    grammar = Grammar()
+    assert set(grammar.states) == set(expected)
+    for name, state in grammar.states.items():
+        assert sorted(state.first_set) == expected[name]['first']
+        if name != 'FUNCTION_CALL_EXT':
+            assert sorted(state.follow_set) == expected[name]['follow']
+
+    # The recursion stopped at a visited state in a cycle and left this one empty
+    assert expected['FUNCTION_CALL_EXT']['follow'] == []
+    assert grammar.states['FUNCTION_CALL_EXT'].follow_set == \
+        grammar.states['ASSIGN_STATEMENT_OR_FUNCTION_CALL'].follow_set
+
+
+def test_cyclic_rules():
+    rules = [
+        ('S', ['A', 'semi']),
+        ('A', ['id', 'B']),
+        ('A', []),
+        ('B', ['dot', 'A']),
+        ('B', ['lpar', 'A', 'rpar', 'C']),
+        ('C', ['A']),
+    ]
+    first, follow = first_follow_sets(rules, 'S')
+    assert first['S'] == _bits('id', 'semi')
+    assert first['A'] == _bits('id', '#')
+    assert first['C'] == _bits('id', '#')
+    assert follow['S'] == 1 << END_OF_INPUT
+    assert follow['A'] == _bits('semi', 'rpar')
+    assert follow['B'] == _bits('semi', 'rpar')
+    assert follow['C'] == _bits('semi', 'rpar')
+
+
+def test_numpy_engine():
+    pytest.importorskip('numpy')
+    bitset = Grammar()
+    numpy = Grammar(first_follow_engine='numpy')
+    for name, state in bitset.states.items():
+        assert numpy.states[name].first_ids == state.first_ids
+        assert numpy.states[name].follow_ids == state.follow_ids
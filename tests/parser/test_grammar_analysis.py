@@ -0,0 +1,60 @@
+import pytest
+from ogle.parser.grammar_analysis import GrammarAnalyzer
+from ogle.parser.parser import Grammar, GrammarError
+
+broken_grammar = '''
+START -> A semi .
+
+A -> id B .
+A -> id C .
+A -> semi .
+A -> .
+
+B -> dot B .
+B -> .
+
+C -> lpar C rpar .
+
+D -> id .
+'''
+
+
+def _analyzer(tmp_path, content):
+    path = tmp_path / 'broken.grm'
+    path.write_text(content)
+    return GrammarAnalyzer(Grammar(str(path)))
+
+
+def test_language_grammar():
+    analyzer = GrammarAnalyzer(Grammar())
+    assert not analyzer.has_problems()
+    filled, total = analyzer.table_density()
+    assert 0 < filled < total
+    assert analyzer.epsilon_chain_depths()['STATEMENTS'] == 1
+
+
+def test_broken_grammar(tmp_path):
+    analyzer = _analyzer(tmp_path, broken_grammar)
+    assert analyzer.first_first_conflicts() == [('A', ['id', 'B'], ['id', 'C'], ['id'])]
+    assert analyzer.first_follow_conflicts() == [('A', ['semi'], ['semi'])]
+    assert analyzer.unreachable() == ['D']
+    assert analyzer.unproductive() == ['C']
+    assert analyzer.epsilon_chain_depths() == {'A': 1, 'B': 1}
+    assert analyzer.has_problems()
+    report = analyzer.report()
+    assert 'FIRST/FIRST conflicts: 1' in report
+    assert 'A -> id B | id C on id' in report
+
+
+def test_two_nullable_rules(tmp_path):
+    analyzer = _analyzer(tmp_path, 'START -> A semi .\nA -> B .\nA -> C .\nB -> .\nC -> .\n')
+    assert analyzer.first_first_conflicts() == [('A', ['B'], ['C'], ['EPSILON'])]
+    assert analyzer.has_problems()
+
+
+def test_undefined_symbols(tmp_path):
+    path = tmp_path / 'undefined.grm'
+    path.write_text('START -> A semi .\nA -> id Q .\nA -> Q R .\n')
+    with pytest.raises(GrammarError) as error:
+        Grammar(str(path))
+    assert error.value.undefined == {'Q': ['A'], 'R': ['A']}
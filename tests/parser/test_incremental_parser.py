@@ -0,0 +1,102 @@
+import pytest
+from ogle.parser.incremental_parser import IncrementalParser
+from tests.parser.parse_helpers import dump, parse
+
+source = '''
+class A {
+    public integer x;
+};
+
+class B inherits A {
+    private float y;
+};
+
+f(integer a) : integer
+    do
+        return (a + 1);
+    end
+
+g() : void
+    do
+        write(2);
+    end
+
+main
+    local
+        integer z;
+    do
+        z = f(3);
+    end
+'''
+
+
+def _full_parse(text):
+    parser = parse(text)
+    return dump(parser.ast.root), parser.errors
+
+
+def _units(ast):
+    classes, functions, main = ast.root.children
+    return list(classes.children) + list(functions.children) + [main]
+
+
+@pytest.mark.parametrize("edited, reused", [
+    (source, 5),
+    (source.replace('return (a + 1);', 'return (a + 2);'), 4),
+    (source.replace('write(2);', 'write(2);\n        write(3);'), 4),
+    (source.replace('private float y;', 'private float y;\n    private float w;'), 4),
+    (source.replace('g() : void', 'h() : void'), 4),
+    (source.replace('z = f(3);', 'z = f(3) * 2;'), 4),
+    ('\n\n' + source.replace('class A', 'class   A'), 5),
+    (source.replace('f(integer a)', 'class C {\n};\n\nf(integer a)'), 5),
+    (source.replace('f(integer a)', 'f(integer a, integer b)'), 4),
+])
+def test_incremental_parse_matches_full_parse(edited, reused):
+    parser = IncrementalParser()
+    parser.parse(source)
+    parser.parse(edited)
+    assert (dump(parser.ast.root), parser.errors) == _full_parse(edited)
+    assert parser.reused_units == reused
+
+
+def test_unchanged_units_are_reused_by_identity():
+    parser = IncrementalParser()
+    old_units = _units(parser.parse(source))
+    new_units = _units(parser.parse(source.replace('write(2);', 'write(4);')))
+    assert [new is old for new, old in zip(new_units, old_units)] == [True, True, True, False, True]
+
+
+def test_reused_units_move_to_the_new_source():
+    parser = IncrementalParser()
+    parser.parse(source)
+    main = _units(parser.parse('\n\n' + source))[-1]
+    assert main.location == (22, 1)
+
+
+# Sources with errors fall back to a full parse, and so do tokens after main,
+# which the parser ignores without an error
+@pytest.mark.parametrize("edited, error_count", [
+    (source.replace('return (a + 1);', 'return (a + );'), 1),
+    (source.replace('write(2);', 'write(2) @'), 6),
+    (source.replace('main', ''), 5),
+    (source + 'class D {\n};\n', 0),
+])
+def test_errors_fall_back_to_full_parse(edited, error_count):
+    parser = IncrementalParser()
+    parser.parse(source)
+    parser.parse(edited)
+    assert parser.reused_units == 0
+    assert len(parser.errors) == error_count
+    assert (dump(parser.ast.root), parser.errors) == _full_parse(edited)
+    # The next parse is complete again
+    parser.parse(source)
+    assert (dump(parser.ast.root), parser.errors) == _full_parse(source)
+
+
+def test_empty_source_falls_back_to_full_parse():
+    parser = IncrementalParser()
+    parser.parse(source)
+    ast = parser.parse('')
+    assert ast.root is None
+    assert parser.reused_units == 0
+    assert parser.errors == parse('').errors == ['Syntax error at location 1:1. Expected START.']
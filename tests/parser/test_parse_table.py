@@ -0,0 +1,56 @@
+import pytest
+from ogle.ast.ast import MAKE_NODE, MAKE_RIGHT_CHILD, decode_action
+from ogle.ast.ast_node import NodeType
+from ogle.parser.grammar_spec import terminal_count, terminal_ids
+from ogle.parser.parser import Grammar
+
+grammar = Grammar()
+
+table_entries = [
+    ('STATEMENT', 'if', ['if', 'lpar', 'REL_EXPRESSION', 'rpar', 'then', 'STATEMENT_BLOCK', 'else', 'STATEMENT_BLOCK', 'semi']),
+    ('STATEMENT', 'id', ['ASSIGN_STATEMENT_OR_FUNCTION_CALL']),
+    ('PROGRAM', 'class', ['CLASS_DECLARATIONS', 'FUNCTION_DEFINITIONS', 'main', 'FUNCTION_BODY']),
+    ('PROGRAM', 'main', ['CLASS_DECLARATIONS', 'FUNCTION_DEFINITIONS', 'main', 'FUNCTION_BODY']),
+    ('FACTOR', 'intnum', ['intnum']),
+]
+
+
+@pytest.mark.parametrize("state_name, lookahead, symbols", table_entries)
+def test_table_entry(state_name, lookahead, symbols):
+    production = grammar.parse_table[(state_name, terminal_ids[lookahead])]
+    assert production.symbols == symbols
+    assert grammar.states[state_name].table[terminal_ids[lookahead]] is production
+
+
+def test_production_steps():
+    production = grammar.parse_table[('PROGRAM', terminal_ids['main'])]
+    make_program = (MAKE_NODE, 'PROGRAM', NodeType.PROGRAM)
+    right_child = (MAKE_RIGHT_CHILD, None, None)
+    assert production.steps == [(make_program, None), (None, 0), (right_child, None), (None, 1), (right_child, None),
+                                (None, 2), (None, 3), (right_child, None), (right_child, None)]
+    assert [state.name for state in production.states] == production.symbols
+
+
+def test_table_covers_first_sets():
+    for state in grammar.states.values():
+        if state.is_terminal:
+            continue
+        for terminal_id in range(terminal_count):
+            assert (state.table[terminal_id] is not None) == bool(state.first_ids[terminal_id])
+
+
+@pytest.mark.parametrize("operation, action", [
+    ('#1', (MAKE_NODE, 'STATEMENTS', NodeType.STATEMENTS)),
+    ('#1(item)', (MAKE_NODE, 'item', NodeType.ITEM)),
+    ('#1(func_call)', (MAKE_NODE, 'func_call', NodeType.FUNCTION_CALL)),
+    ('#1(other)', (MAKE_NODE, 'other', NodeType.GENERAL)),
+    ('#2', (MAKE_RIGHT_CHILD, None, None)),
+    ('#7', (7, None, None)),
+])
+def test_decode_action(operation, action):
+    assert decode_action(operation, 'STATEMENTS') == action
+
+
+def test_decode_unknown_action():
+    with pytest.raises(ValueError):
+        decode_action('#8', 'STATEMENTS')
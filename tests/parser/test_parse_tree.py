@@ -0,0 +1,41 @@
+from io import StringIO
+from ogle.lexer.lexer import Lexer
+from ogle.parser.parser import Parser
+from ogle.parser.parse_tree import ParseTree
+
+expected_derivations = [
+    'PROGRAM ',
+    'CLASS_DECLARATIONS FUNCTION_DEFINITIONS main FUNCTION_BODY ',
+    'FUNCTION_DEFINITIONS main FUNCTION_BODY ',
+    'main FUNCTION_BODY ',
+    'main LOCAL_SCOPE do STATEMENTS end ',
+    'main do STATEMENTS end ',
+    'main do end ',
+]
+
+
+def test_derivations():
+    parser = Parser(Lexer('main do end'))
+    parser.parse()
+    assert parser.parse_tree.derivation_list == expected_derivations
+    # Only the replaced leaves are recorded
+    assert [node.name for node in parser.parse_tree.steps] == \
+        ['START', 'PROGRAM', 'CLASS_DECLARATIONS', 'FUNCTION_DEFINITIONS', 'FUNCTION_BODY', 'LOCAL_SCOPE', 'STATEMENTS']
+
+
+def test_write_derivations():
+    parser = Parser(Lexer('main do end'))
+    parser.parse()
+    output = StringIO()
+    parser.parse_tree.write_derivations(output)
+    assert output.getvalue() == ''.join(derivation + '\n' for derivation in expected_derivations)
+
+
+def test_steps_after_unexpanded_leaf():
+    tree = ParseTree('A')
+    tree.expand(tree.root, ['B', 'C', 'D'])
+    # B is left unexpanded, like a state skipped by panic mode
+    c, d = tree.root.children[1:]
+    tree.expand(c, ['x', 'y'])
+    tree.delete(d)
+    assert tree.derivation_list == ['B C D ', 'B x y D ', 'B x y ']
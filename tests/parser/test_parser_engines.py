@@ -0,0 +1,84 @@
+import os
+import sys
+import traceback
+import pytest
+from ogle.lexer.lexer import Lexer
+from ogle.parser.parser import Parser
+from tests.parser.parse_helpers import dump, parse
+from tests.parser.test_correct_parse import input_codes as correct_codes
+from tests.parser.test_syntax_error import input_codes as syntax_error_codes
+
+src_directory = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'data', 'src')
+src_files = [os.path.join(src_directory, name) for name in sorted(os.listdir(src_directory))]
+
+
+def _read(file_name):
+    with open(file_name) as file:
+        return file.read()
+
+
+inputs = correct_codes + syntax_error_codes + [_read(file_name) for file_name in src_files]
+
+
+def _parse(text, engine, build_parse_tree=True):
+    parser = parse(text, engine, build_parse_tree)
+    return dump(parser.ast.root), parser.errors
+
+
+@pytest.mark.parametrize("engine", [engine for engine in Parser.engines if engine != 'recursive'])
+@pytest.mark.parametrize("input_file", inputs)
+def test_engine_matches_recursive_parser(engine, input_file):
+    assert _parse(input_file, engine) == _parse(input_file, 'recursive')
+
+
+@pytest.mark.parametrize("engine", ['iterative', 'recursive'])
+@pytest.mark.parametrize("input_file", inputs)
+def test_engine_without_parse_tree(engine, input_file):
+    assert _parse(input_file, engine, build_parse_tree=False) == _parse(input_file, 'recursive')
+
+
+@pytest.mark.parametrize("input_file", correct_codes)
+def test_iterative_engine_derivations(input_file):
+    iterative = Parser(Lexer(input_file), engine='iterative')
+    iterative.parse()
+    recursive = Parser(Lexer(input_file), engine='recursive')
+    recursive.parse()
+    assert iterative.parse_tree.derivation_list == recursive.parse_tree.derivation_list
+
+
+def test_generated_engine_has_no_parse_tree():
+    parser = Parser(Lexer('main do x = 1; end'), engine='generated')
+    parser.parse()
+    assert parser.parse_tree is None
+    assert not parser.errors
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        Parser(Lexer(''), engine='unknown')
+
+
+def test_iterative_engine_deep_nesting():
+    depth = 100
+    text = 'main do x = ' + '(' * depth + '1' + ')' * depth + '; end'
+    recursion_limit = sys.getrecursionlimit()
+    # Leave less room than the recursive engine needs for the nesting
+    sys.setrecursionlimit(len(traceback.extract_stack()) + 150)
+    try:
+        with pytest.raises(RecursionError):
+            Parser(Lexer(text), engine='recursive').parse()
+        parser = Parser(Lexer(text), engine='iterative')
+        parser.parse()
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+    assert not parser.errors
+    assert parser.ast.root.name == 'PROGRAM'
+
+
+def test_deep_nesting_without_parse_tree():
+    depth = 3000
+    text = 'main do x = ' + '(' * depth + '1' + ')' * depth + '; end'
+    parser = Parser(Lexer(text), build_parse_tree=False)
+    parser.parse()
+    assert not parser.errors
+    assert parser.parse_tree is None
@@ -0,0 +1,71 @@
+import pytest
+from ogle.lexer.lexer import Lexer
+from ogle.parser.parser import Parser
+from ogle.parser.parser_hooks import ParserHooks, ParseStats
+from tests.parser.parse_helpers import dump, parse
+from tests.parser.test_error_recovery import missing_rpar
+from tests.parser.test_parser_engines import inputs
+
+
+class RecordingHooks(ParserHooks):
+    def __init__(self):
+        self.events = []
+
+    def on_expand(self, name, symbols):
+        self.events.append(('expand', name))
+
+    def on_epsilon(self, name):
+        self.events.append(('epsilon', name))
+
+    def on_match(self, token):
+        self.events.append(('match', token.value))
+
+    def on_error(self, name, message):
+        self.events.append(('error', name))
+
+    def on_skip(self, token):
+        self.events.append(('skip', token.value))
+
+
+def _parse(text, engine, hooks):
+    parser = parse(text, engine, hooks=hooks)
+    return dump(parser.ast.root), parser.errors
+
+
+@pytest.mark.parametrize("engine", ['iterative', 'recursive'])
+@pytest.mark.parametrize("input_file", inputs)
+def test_hooks_do_not_change_the_parse(engine, input_file):
+    assert _parse(input_file, engine, ParseStats()) == _parse(input_file, engine, None)
+
+
+def test_engines_report_the_same_events():
+    iterative = RecordingHooks()
+    _parse(missing_rpar, 'iterative', iterative)
+    recursive = RecordingHooks()
+    _parse(missing_rpar, 'recursive', recursive)
+    assert iterative.events == recursive.events
+
+
+def test_events():
+    hooks = RecordingHooks()
+    _parse('main do x = ; end', 'iterative', hooks)
+    assert hooks.events[:4] == [('expand', 'START'), ('expand', 'PROGRAM'), ('epsilon', 'CLASS_DECLARATIONS'),
+                                ('epsilon', 'FUNCTION_DEFINITIONS')]
+    assert ('error', 'EXPRESSION') in hooks.events
+
+
+def test_parse_stats():
+    stats = ParseStats()
+    _parse(missing_rpar, 'iterative', stats)
+    tokens = len(Lexer(missing_rpar).all_tokens())
+    assert stats.tokens_consumed == tokens
+    assert stats.panic_invocations == 2
+    assert stats.tokens_skipped == 1
+    assert stats.expansions['STATEMENT'] == 3
+    assert stats.elapsed > 0
+    assert 'Panic-mode invocations: 2' in stats.report()
+
+
+def test_generated_engine_has_no_hooks():
+    with pytest.raises(ValueError):
+        Parser(Lexer('main do end'), engine='generated', hooks=ParseStats())
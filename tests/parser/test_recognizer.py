@@ -0,0 +1,29 @@
+import pytest
+from ogle.lexer.lexer import Lexer
+from ogle.parser.recognizer import Recognizer, check_syntax
+from tests.parser.parse_helpers import parse
+from tests.parser.test_error_recovery import missing_rpar
+from tests.parser.test_parser_engines import inputs
+
+
+# Inputs that cannot start the program
+unstartable = ['', '}}} garbage', 'do local if integer arr[7]; end']
+
+
+@pytest.mark.parametrize("input_file", inputs + unstartable + [missing_rpar, 'main do x = 1 @ 2; end'])
+def test_recognizer_matches_parser_errors(input_file):
+    assert check_syntax(Lexer(input_file)) == parse(input_file).errors
+
+
+@pytest.mark.parametrize("input_file", unstartable)
+def test_recognizer_rejects_inputs_that_cannot_start(input_file):
+    assert check_syntax(Lexer(input_file)) == ['Syntax error at location 1:1. Expected START.']
+
+
+def test_recognizer_builds_nothing():
+    recognizer = Recognizer(Lexer('main local integer x; do x = (1 + 2) * 3; write(x); end'))
+    recognizer.parse()
+    assert not recognizer.errors
+    assert recognizer.ast.root is None
+    assert not recognizer.ast.stack
+    assert recognizer.parse_tree is None
@@ -10,7 +10,7 @@ def _get_errors_warnings(all_errors):
 
 def get_semantic_errors(input_file):
     lexer = Lexer(input_file)
-    parser = Parser(lexer)
+    parser = Parser(lexer, build_parse_tree=False)
     parser.parse()
     semantic_analyzer = SemanticAnalyzer(parser.ast)
     semantic_analyzer.analyze()
@@ -18,7 +18,7 @@ def get_semantic_errors(input_file):
 
 def run(input_file, output_filename):
     lexer = Lexer(input_file)
-    parser = Parser(lexer)
+    parser = Parser(lexer, build_parse_tree=False)
     parser.parse()
     semantic_analyzer = SemanticAnalyzer(parser.ast)
     semantic_analyzer.analyze()